@@ -0,0 +1,202 @@
+"""
+Before/After Daylight Assessment
+
+Compares the VSC at existing windows before and after a proposed development
+and applies the BRE guideline: a window is noticeably affected if its VSC
+drops below 27% *and* to less than 0.8 times its former value.
+
+Key concepts:
+- The baseline scene is traced once per window; every design option then
+  starts from that visibility mask instead of tracing the full scene again
+- Added meshes can only block rays that were visible before and pass
+  through an added mesh's bounding box: only those are traced, and only
+  against the added meshes
+- Removed meshes can only unblock rays that were blocked before and pass
+  through a removed mesh's bounding box: only those are re-traced against
+  the proposed scene
+- Every other ray keeps its baseline result, so an option that changes a
+  few buildings costs a small fraction of a full trace
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from batch import (CIE_SKY_MULTIPLIER, DEFAULT_CHUNK_SIZE, ORIGIN_OFFSET, _normalize,
+                   compute_visibility, hemisphere_directions, sky_weights)
+from main import HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION
+from obstruction import Mesh, Scene, rays_hit_box, trace_occlusion
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BRE_VSC_TARGET = 27.0          # VSC (%) at or above which a window is adequately lit
+BRE_RETAINED_FRACTION = 0.8    # Minimum after/before ratio (a reduction of at most 20%)
+
+ASSESSMENT_DTYPE = np.dtype([
+    ('vsc_before', np.float64),   # Baseline VSC (percentage)
+    ('vsc_after', np.float64),    # VSC with the design option (percentage)
+    ('ratio', np.float64),        # vsc_after / vsc_before (1 if both are 0)
+    ('passes', np.bool_),         # BRE guideline met
+    ('retraced_rays', np.int64),  # Rays traced for this option (diagnostics)
+])
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Design Options
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class DesignOption:
+    """
+    A proposed change to the baseline scene.
+
+    Attributes:
+        name: Label used in the results (e.g. "option-a", "massing-v2")
+        added: Meshes the proposal adds
+        removed: Indices into the baseline scene's `meshes` that it demolishes
+    """
+    name: str
+    added: list[Mesh] = field(default_factory=list)
+    removed: list[int] = field(default_factory=list)
+
+    def apply(self, baseline: Scene) -> Scene:
+        """Return the proposed scene: baseline minus removed plus added meshes."""
+        removed = set(self.removed)
+        if any(i < 0 or i >= len(baseline.meshes) for i in removed):
+            raise IndexError(f"{self.name}: removed mesh index out of range "
+                             f"(baseline has {len(baseline.meshes)} meshes)")
+        kept = [m for i, m in enumerate(baseline.meshes) if i not in removed]
+        return Scene(kept + list(self.added))
+
+
+def bre_assessment(vsc_before: np.ndarray, vsc_after: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Apply the BRE before/after rule.
+
+    Args:
+        vsc_before: Baseline VSC (percentage)
+        vsc_after: Proposed VSC (percentage)
+
+    Returns:
+        Tuple of (after/before ratio, pass mask). A window fails only if its
+        VSC falls below `BRE_VSC_TARGET` and below `BRE_RETAINED_FRACTION`
+        of its former value.
+    """
+    vsc_before = np.asarray(vsc_before, dtype=np.float64)
+    vsc_after = np.asarray(vsc_after, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(vsc_before > 0, vsc_after / vsc_before, 1.0)
+    passes = (vsc_after >= BRE_VSC_TARGET) | (ratio >= BRE_RETAINED_FRACTION)
+    return ratio, passes
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Differential Tracing
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _rays_hit_meshes(origins: np.ndarray, directions: np.ndarray,
+                     meshes: Sequence[Mesh]) -> np.ndarray:
+    """Mask of rays entering the bounding box of any of the meshes."""
+    hit = np.zeros(len(origins), dtype=bool)
+    for mesh in meshes:
+        if len(mesh.triangles) == 0:
+            continue
+        box_min, box_max = mesh.bounds()
+        todo = ~hit
+        hit[todo] = rays_hit_box(origins[todo], directions[todo], box_min, box_max)
+    return hit
+
+
+def assess_design_options(
+    points: np.ndarray,
+    normals: np.ndarray,
+    baseline: Scene,
+    options: Sequence[DesignOption],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+    vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+    origin_offset: float = ORIGIN_OFFSET,
+) -> dict[str, np.ndarray]:
+    """
+    Assess many windows against several design options.
+
+    The baseline is traced once per chunk of windows and shared by all
+    options; each option only traces the rays its changed meshes can affect.
+    For every option, the result equals a full `compute_vsc_batch` on the
+    proposed scene.
+
+    Args:
+        points: Window centre points, shape (N, 3)
+        normals: Window normals, shape (N, 3); normalised internally
+        baseline: Existing obstruction scene
+        options: Design options to compare against the baseline
+        chunk_size: Windows per chunk (bounds the (N, D) visibility mask)
+        horizontal_resolution: Number of azimuth samples
+        vertical_resolution: Number of elevation samples
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ)
+        origin_offset: Distance to lift ray origins off the surface
+
+    Returns:
+        Option name → structured array of shape (N,) with `ASSESSMENT_DTYPE`
+    """
+    names = [option.name for option in options]
+    if len(set(names)) != len(names):
+        raise ValueError(f"design option names must be unique, got {names}")
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = _normalize(normals)
+    directions, solid_angles = hemisphere_directions(horizontal_resolution, vertical_resolution)
+
+    # Scenes are shared by all chunks so each BVH is built at most once
+    proposals = [(option, option.apply(baseline), Scene(list(option.added)),
+                  [baseline.meshes[i] for i in set(option.removed)])
+                 for option in options]
+    results = {name: np.zeros(len(points), dtype=ASSESSMENT_DTYPE) for name in names}
+
+    for start in range(0, len(points), chunk_size):
+        stop = min(start + chunk_size, len(points))
+        chunk_points, chunk_normals = points[start:stop], normals[start:stop]
+        weights = sky_weights(chunk_normals, directions, solid_angles, sky_multiplier)
+        front = weights > 0
+        visible = compute_visibility(baseline, chunk_points, chunk_normals, directions,
+                                     active=front, origin_offset=origin_offset)
+
+        # Flatten the front-facing rays once; options work on these arrays
+        point_idx, dir_idx = np.nonzero(front)
+        origins = chunk_points[point_idx] + origin_offset * chunk_normals[point_idx]
+        ray_dirs = directions[dir_idx]
+        ray_weights = weights[point_idx, dir_idx]
+        before = visible[point_idx, dir_idx]
+        vsc_before = np.bincount(point_idx, ray_weights * before, minlength=stop - start)
+
+        for option, proposed, added_scene, removed_meshes in proposals:
+            after = before.copy()
+            retraced = np.zeros(len(before), dtype=bool)
+
+            if added_scene.triangle_count:
+                rays = np.flatnonzero(before)
+                rays = rays[_rays_hit_meshes(origins[rays], ray_dirs[rays], option.added)]
+                after[rays] = ~trace_occlusion(added_scene.bvh, origins[rays], ray_dirs[rays])
+                retraced[rays] = True
+
+            if removed_meshes:
+                rays = np.flatnonzero(~before)
+                rays = rays[_rays_hit_meshes(origins[rays], ray_dirs[rays], removed_meshes)]
+                after[rays] = ~trace_occlusion(proposed.bvh, origins[rays], ray_dirs[rays])
+                retraced[rays] = True
+
+            vsc_after = np.bincount(point_idx, ray_weights * after, minlength=stop - start)
+            ratio, passes = bre_assessment(vsc_before, vsc_after)
+            out = results[option.name][start:stop]
+            out['vsc_before'] = vsc_before
+            out['vsc_after'] = vsc_after
+            out['ratio'] = ratio
+            out['passes'] = passes
+            out['retraced_rays'] = np.bincount(point_idx, retraced, minlength=stop - start)
+
+    return results
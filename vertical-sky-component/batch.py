@@ -0,0 +1,294 @@
+"""
+Batched VSC Computation
+
+Vectorised counterpart of `compute_vsc_for_surface_normal` in `main.py`:
+computes the VSC for many observation points at once, optionally against an
+obstruction scene.
+
+Key concepts:
+- The hemisphere is sampled on the same 180×45 lattice as `main.py`
+- Each (point, direction) pair gets a weight: surface_flux × CIE × dω
+- A ray that hits the scene contributes nothing; VSC = Σ weight × visible
+- `compute_sky_metrics` reuses one visibility mask for several integrands
+  (VSC, sky view factors, obstruction profile) instead of tracing per metric
+"""
+
+from collections.abc import Iterator
+
+import numpy as np
+
+from main import HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION
+from obstruction import Scene, trace_occlusion
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+CIE_SKY_MULTIPLIER = 2.0   # k in L ∝ 1 + k·sin(θ); 2 is the CIE overcast sky
+ORIGIN_OFFSET = 1e-3       # Rays start this far along the normal (scene units)
+DEFAULT_CHUNK_SIZE = 256   # Observation points per chunk
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Hemisphere Quadrature
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def hemisphere_directions(
+    horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+    vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sample directions and solid angles on the upper hemisphere.
+
+    Uses the same midpoint lattice as `compute_ray_directions`, flattened in
+    azimuth-major order (index = azimuth * vertical_resolution + elevation).
+
+    Args:
+        horizontal_resolution: Number of azimuth samples
+        vertical_resolution: Number of elevation samples
+
+    Returns:
+        Tuple of (directions with shape (D, 3), solid angles with shape (D,))
+    """
+    delta_theta = (np.pi / 2) / vertical_resolution
+    delta_alpha = (2 * np.pi) / horizontal_resolution
+
+    theta = np.linspace(delta_theta/2, np.pi/2 - delta_theta/2, vertical_resolution)
+    alpha = np.linspace(0, 2*np.pi - delta_alpha, horizontal_resolution)
+    THETA, ALPHA = np.meshgrid(theta, alpha)
+
+    directions = np.stack([
+        np.cos(THETA) * np.cos(ALPHA),
+        np.cos(THETA) * np.sin(ALPHA),
+        np.sin(THETA),
+    ], axis=-1).reshape(-1, 3)
+    solid_angles = (np.cos(THETA) * delta_alpha * delta_theta).reshape(-1)
+
+    return directions, solid_angles
+
+
+def ideal_horizontal_sky_component(sky_multiplier: float = CIE_SKY_MULTIPLIER) -> float:
+    """
+    Exact sky component of an unobstructed, upward-facing surface.
+
+    ∫∫ sin(θ) · (1 + k·sin(θ)) · cos(θ) dθ dα = 2π · (1/2 + k/3)
+
+    For the CIE sky (k = 2) this is 7π/3 = IDEAL_HORIZONTAL_SKY_COMPONENT.
+
+    Args:
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ)
+
+    Returns:
+        Normalisation constant for VSC percentages
+    """
+    return 2 * np.pi * (0.5 + sky_multiplier / 3)
+
+
+def sky_weights(
+    normals: np.ndarray,
+    directions: np.ndarray,
+    solid_angles: np.ndarray,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+) -> np.ndarray:
+    """
+    VSC contribution of every sky direction for every surface normal.
+
+    Args:
+        normals: Unit surface normals, shape (N, 3)
+        directions: Sample directions, shape (D, 3)
+        solid_angles: Solid angle per direction, shape (D,)
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ)
+
+    Returns:
+        Weights in VSC percent, shape (N, D); back-facing directions are 0
+    """
+    surface_flux = np.clip(normals @ directions.T, 0.0, None)
+    sky_factor = (1 + sky_multiplier * directions[:, 2]) * solid_angles
+    return 100 * surface_flux * sky_factor / ideal_horizontal_sky_component(sky_multiplier)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Visibility and VSC
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _normalize(normals: np.ndarray) -> np.ndarray:
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    return normals / np.linalg.norm(normals, axis=1, keepdims=True)
+
+
+def compute_visibility(
+    scene: Scene | None,
+    points: np.ndarray,
+    normals: np.ndarray,
+    directions: np.ndarray,
+    active: np.ndarray | None = None,
+    origin_offset: float = ORIGIN_OFFSET,
+) -> np.ndarray:
+    """
+    Trace every (point, direction) ray against the scene.
+
+    Args:
+        scene: Obstruction scene, or None for an unobstructed sky
+        points: Observation points, shape (N, 3)
+        normals: Unit surface normals, shape (N, 3)
+        directions: Sample directions, shape (D, 3)
+        active: Optional (N, D) mask of rays worth tracing (e.g. front-facing)
+        origin_offset: Distance to lift ray origins off the surface
+
+    Returns:
+        Boolean mask of shape (N, D), True where the sky is visible
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    visible = np.ones((len(points), len(directions)), dtype=bool)
+    if active is not None:
+        visible &= active
+    if scene is None or scene.triangle_count == 0:
+        return visible
+
+    point_idx, dir_idx = np.nonzero(visible)
+    origins = points[point_idx] + origin_offset * normals[point_idx]
+    blocked = trace_occlusion(scene.bvh, origins, directions[dir_idx])
+    visible[point_idx[blocked], dir_idx[blocked]] = False
+    return visible
+
+
+def compute_vsc_batch(
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+    vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+    origin_offset: float = ORIGIN_OFFSET,
+) -> np.ndarray:
+    """
+    Compute the VSC for many observation points.
+
+    With `scene=None` this matches `compute_vsc_for_surface_normal` for each
+    normal, but evaluates all points and directions in one vectorised pass.
+
+    Args:
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3); normalised internally
+        scene: Obstruction scene, or None for an unobstructed sky
+        horizontal_resolution: Number of azimuth samples
+        vertical_resolution: Number of elevation samples
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ)
+        origin_offset: Distance to lift ray origins off the surface
+
+    Returns:
+        VSC values (percentage), shape (N,)
+    """
+    normals = _normalize(normals)
+    directions, solid_angles = hemisphere_directions(horizontal_resolution, vertical_resolution)
+    weights = sky_weights(normals, directions, solid_angles, sky_multiplier)
+    visible = compute_visibility(scene, points, normals, directions,
+                                 active=weights > 0, origin_offset=origin_offset)
+    return np.sum(weights * visible, axis=1)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Multi-metric Single Pass
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def metrics_dtype(horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+                  profile: bool = False) -> np.dtype:
+    """
+    Structured dtype returned by `compute_sky_metrics`.
+
+    Fields:
+        vsc: CIE-weighted vertical sky component (percentage, 0-100)
+        sky_view_factor: Visible sky solid angle / 2π (0-1, unweighted)
+        cosine_sky_view_factor: (1/π) ∫ cos(α) dω over the visible sky (0-1),
+            the cosine-weighted form given in `info-vsc.md`
+        obstruction_profile: Only with `profile=True`; per azimuth sample, the
+            elevation in degrees up to which the sky is obstructed (upper edge
+            of the highest blocked sample), 0 if clear, NaN if no sky at that
+            azimuth faces the surface
+    """
+    fields = [('vsc', np.float64), ('sky_view_factor', np.float64),
+              ('cosine_sky_view_factor', np.float64)]
+    if profile:
+        fields.append(('obstruction_profile', np.float64, (horizontal_resolution,)))
+    return np.dtype(fields)
+
+
+def compute_sky_metrics(
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    profile: bool = False,
+    horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+    vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+    origin_offset: float = ORIGIN_OFFSET,
+) -> np.ndarray:
+    """
+    Compute VSC, sky view factors and optionally the obstruction profile
+    from a single tracing pass per observation point.
+
+    Args:
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3); normalised internally
+        scene: Obstruction scene, or None for an unobstructed sky
+        profile: Also return the per-azimuth obstruction profile
+        horizontal_resolution: Number of azimuth samples
+        vertical_resolution: Number of elevation samples
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ) (VSC only)
+        origin_offset: Distance to lift ray origins off the surface
+
+    Returns:
+        Structured array of shape (N,) with dtype `metrics_dtype(...)`
+    """
+    normals = _normalize(normals)
+    directions, solid_angles = hemisphere_directions(horizontal_resolution, vertical_resolution)
+    surface_flux = np.clip(normals @ directions.T, 0.0, None)
+    front = surface_flux > 0
+    visible = compute_visibility(scene, points, normals, directions,
+                                 active=front, origin_offset=origin_offset)
+
+    result = np.zeros(len(normals), dtype=metrics_dtype(horizontal_resolution, profile))
+    weights = sky_weights(normals, directions, solid_angles, sky_multiplier)
+    result['vsc'] = np.sum(weights * visible, axis=1)
+    result['sky_view_factor'] = visible @ solid_angles / (2 * np.pi)
+    result['cosine_sky_view_factor'] = np.sum(surface_flux * visible * solid_angles, axis=1) / np.pi
+
+    if profile:
+        shape = (len(normals), horizontal_resolution, vertical_resolution)
+        blocked = (front & ~visible).reshape(shape)
+        delta_theta = 90.0 / vertical_resolution
+        top_edge = (np.arange(vertical_resolution) + 1) * delta_theta
+        angles = np.max(np.where(blocked, top_edge, 0.0), axis=2)
+        angles[~front.reshape(shape).any(axis=2)] = np.nan
+        result['obstruction_profile'] = angles
+
+    return result
+
+
+def iter_vsc_chunks(
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **kwargs,
+) -> Iterator[tuple[int, int, np.ndarray]]:
+    """
+    Compute the VSC chunk by chunk.
+
+    Args:
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3)
+        scene: Obstruction scene, or None for an unobstructed sky
+        chunk_size: Number of points per chunk
+        **kwargs: Forwarded to `compute_vsc_batch`
+
+    Yields:
+        Tuples of (start, stop, VSC values for points[start:stop])
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    for start in range(0, len(points), chunk_size):
+        stop = min(start + chunk_size, len(points))
+        yield start, stop, compute_vsc_batch(points[start:stop], normals[start:stop],
+                                             scene, **kwargs)
@@ -0,0 +1,273 @@
+"""
+Persistent VSC Result Cache
+
+A content-addressed, on-disk cache of per-point VSC results, so re-opened
+projects and unchanged plan phases do not trace the same rays again.
+
+Key concepts:
+- A *context* digest hashes everything shared by a request: mesh geometry,
+  sky model, quadrature resolution and ray origin offset
+- Each observation point is keyed by (context, point, normal), so requests
+  that only partially overlap still reuse the points they have in common
+- Entries live in SQLite: safe for concurrent readers and writers across
+  worker processes, with least-recently-used eviction above a size bound
+- The entry count is kept in a `meta` table, updated in the same
+  transaction as every write, so checking the bound never scans the table
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from batch import CIE_SKY_MULTIPLIER, ORIGIN_OFFSET, compute_vsc_batch
+from main import HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION
+from obstruction import Scene
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+CACHE_VERSION = 1                # Bump when the VSC algorithm changes results
+DEFAULT_MAX_ENTRIES = 5_000_000  # Roughly 0.5 GB on disk, including the LRU index
+SQLITE_BATCH = 500               # Keys per IN (...) query
+LOCK_TIMEOUT = 60.0              # Seconds to wait for another process's write lock
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Hashing
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _canonical(values: np.ndarray) -> np.ndarray:
+    """Float64, C-ordered, with -0.0 folded into 0.0 so equal inputs hash equal."""
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64) + 0.0)
+
+
+def scene_digest(scene: Scene | None) -> bytes:
+    """
+    Hash the geometry of a scene.
+
+    Mesh names are ignored; mesh order, vertex positions and triangle
+    indices are not.
+
+    Returns:
+        32-byte SHA-256 digest
+    """
+    h = hashlib.sha256(b'scene')
+    for mesh in (scene.meshes if scene is not None else []):
+        h.update(np.array(mesh.vertices.shape + mesh.triangles.shape, dtype=np.int64).tobytes())
+        h.update(_canonical(mesh.vertices).tobytes())
+        h.update(np.ascontiguousarray(mesh.triangles, dtype=np.int64).tobytes())
+    return h.digest()
+
+
+def context_digest(
+    scene: Scene | None,
+    horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+    vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+    origin_offset: float = ORIGIN_OFFSET,
+) -> bytes:
+    """
+    Hash everything except the observation points that determines a result.
+
+    Arguments mirror `compute_vsc_batch`.
+
+    Returns:
+        32-byte SHA-256 digest
+    """
+    h = hashlib.sha256(f'vsc-v{CACHE_VERSION}'.encode())
+    h.update(scene_digest(scene))
+    h.update(np.array([horizontal_resolution, vertical_resolution], dtype=np.int64).tobytes())
+    h.update(_canonical([sky_multiplier, origin_offset]).tobytes())
+    return h.digest()
+
+
+def point_keys(context: bytes, points: np.ndarray, normals: np.ndarray) -> list[bytes]:
+    """
+    Per-point cache keys: a keyed BLAKE2b hash of the point and its normal.
+
+    Returns:
+        One 16-byte key per point
+    """
+    rows = np.hstack([_canonical(points).reshape(-1, 3), _canonical(normals).reshape(-1, 3)])
+    return [hashlib.blake2b(row.tobytes(), digest_size=16, key=context).digest() for row in rows]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Storage
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of per-point VSC values in a SQLite file.
+
+    Each process opens its own connection lazily, so a `ResultCache` can be
+    passed to (or re-created in) worker processes pointing at the same file.
+    Within a process, calls from different threads are serialised.
+
+    Args:
+        path: Database file; `~` is expanded and parent directories are
+            created as needed
+        max_entries: Evict least-recently-used entries beyond this count
+    """
+
+    def __init__(self, path: str | os.PathLike, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = os.path.expanduser(os.fspath(path))
+        self.max_entries = max_entries
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> dict:
+        return {'path': self.path, 'max_entries': self.max_entries}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS results ('
+                         'key BLOB PRIMARY KEY, value REAL NOT NULL, last_used REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS results_lru ON results(last_used)')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta ('
+                         'name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if conn.execute("SELECT 1 FROM meta WHERE name = 'entries'").fetchone() is None:
+                    # Counted once, for files written before the counter existed
+                    conn.execute("INSERT INTO meta VALUES ('entries', (SELECT COUNT(*) FROM results))")
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute(
+                "SELECT value FROM meta WHERE name = 'entries'").fetchone()[0]
+
+    def get_many(self, keys: list[bytes]) -> np.ndarray:
+        """
+        Look up keys and mark hits as recently used.
+
+        Returns:
+            Values aligned with `keys`; misses are NaN
+        """
+        values = np.full(len(keys), np.nan)
+        index = {key: i for i, key in enumerate(keys)}
+        now = time.time()
+        with self._lock:
+            conn = self.connection
+            for lo in range(0, len(keys), SQLITE_BATCH):
+                batch = keys[lo:lo + SQLITE_BATCH]
+                marks = ','.join('?' * len(batch))
+                rows = conn.execute(f'SELECT key, value FROM results WHERE key IN ({marks})',
+                                    batch).fetchall()
+                for key, value in rows:
+                    values[index[key]] = value
+                if rows:
+                    conn.execute(f'UPDATE results SET last_used = ? WHERE key IN ({marks})',
+                                 [now, *batch])
+        return values
+
+    def put_many(self, keys: list[bytes], values: np.ndarray) -> None:
+        """Store values, then evict least-recently-used entries if over budget."""
+        now = time.time()
+        rows = [(key, float(value), now) for key, value in zip(keys, values)]
+        with self._lock:
+            conn = self.connection
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                unique = list(dict.fromkeys(keys))
+                existing = 0
+                for lo in range(0, len(unique), SQLITE_BATCH):
+                    batch = unique[lo:lo + SQLITE_BATCH]
+                    marks = ','.join('?' * len(batch))
+                    existing += conn.execute(f'SELECT COUNT(*) FROM results WHERE key IN ({marks})',
+                                             batch).fetchone()[0]
+                conn.executemany('INSERT OR REPLACE INTO results (key, value, last_used) '
+                                 'VALUES (?, ?, ?)', rows)
+                entries = conn.execute(
+                    "UPDATE meta SET value = value + ? WHERE name = 'entries' RETURNING value",
+                    (len(unique) - existing,)).fetchone()[0]
+                excess = entries - self.max_entries
+                if excess > 0:
+                    conn.execute('DELETE FROM results WHERE key IN '
+                                 '(SELECT key FROM results ORDER BY last_used LIMIT ?)', (excess,))
+                    conn.execute("UPDATE meta SET value = value - ? WHERE name = 'entries'", (excess,))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self.connection
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DELETE FROM results')
+                conn.execute("UPDATE meta SET value = 0 WHERE name = 'entries'")
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Cached Computation
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def compute_vsc_cached(
+    cache: ResultCache,
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    **options,
+) -> np.ndarray:
+    """
+    `compute_vsc_batch` backed by a persistent cache.
+
+    Only points missing from the cache are traced; their finite results are
+    stored for the next request (NaN, e.g. for a zero normal, is never cached).
+
+    Args:
+        cache: Result cache
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3)
+        scene: Obstruction scene, or None for an unobstructed sky
+        **options: Forwarded to `compute_vsc_batch`
+
+    Returns:
+        VSC values (percentage), shape (N,)
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    keys = point_keys(context_digest(scene, **options), points, normals)
+
+    values = cache.get_many(keys)
+    missing = np.flatnonzero(np.isnan(values))
+    if len(missing):
+        values[missing] = compute_vsc_batch(points[missing], normals[missing], scene, **options)
+        # NaN is the miss marker of `get_many` and cannot be stored as REAL NOT NULL
+        storable = missing[np.isfinite(values[missing])]
+        cache.put_many([keys[i] for i in storable], values[storable])
+    return values
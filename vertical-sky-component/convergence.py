@@ -0,0 +1,321 @@
+"""
+Hemisphere Resolution Convergence Study
+
+Decides how many hemisphere samples are enough instead of taking the 180×45
+grid of `main.py` on faith: representative cases are evaluated on a ladder
+of resolutions, Richardson extrapolation estimates the converged VSC, and
+the cheapest resolution within a target error is recommended and saved for
+production runs.
+
+Key concepts:
+- The ladder refines both axes by a constant ratio r (default 2), keeping
+  the 4:1 azimuth-to-elevation aspect of the production grid
+- From the last three levels f₁, f₂, f₃ the observed order is
+  p = log((f₂ − f₁) / (f₃ − f₂)) / log r and the extrapolated value is
+  f∞ = f₃ + (f₃ − f₂) / (r^p − 1)
+- Obstructed cases converge irregularly (visibility is discontinuous). If
+  the differences do not shrink monotonically at a plausible order, f₃ is
+  kept as the estimate and |f₃ − f₂| is added to every error as an
+  uncertainty
+- `recommended_resolution()` reads the saved study so callers can pass
+  `**recommended_resolution()` to `compute_vsc_batch` and friends. The study
+  is saved in the user cache directory (`$XDG_CACHE_HOME/vsc`, by default
+  `~/.cache/vsc`), not next to the source
+
+Usage:
+    python convergence.py --target 0.25                # built-in cases
+    python convergence.py --scene city.vscscene --points p.npy --normals n.npy
+"""
+
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from batch import compute_vsc_batch
+from main import HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION
+from obstruction import Mesh, Scene
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'vsc')
+RESOLUTION_FILE = os.path.join(CACHE_DIR, 'resolution.json')
+DEFAULT_TARGET_ERROR = 0.25   # VSC percentage points
+LADDER_BASE = 5               # Elevation samples on the coarsest level
+LADDER_LEVELS = 5
+MIN_LADDER_LEVELS = 3         # Richardson extrapolation needs three levels
+LADDER_RATIO = 2
+ORDER_RANGE = (1.0, 4.0)      # Plausible orders: 1 with visibility edges, 2 for a smooth sky
+ASPECT = HORIZONTAL_ANGLE_RESOLUTION // VERTICAL_ANGLE_RESOLUTION  # Azimuth per elevation sample
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Representative Cases
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class ConvergenceCase:
+    """
+    Observation points evaluated together in a study.
+
+    Attributes:
+        name: Label in reports
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3)
+        scene: Obstruction scene, or None for an unobstructed sky
+    """
+    name: str
+    points: np.ndarray
+    normals: np.ndarray
+    scene: Scene | None = None
+
+
+def _block(x0: float, y0: float, x1: float, y1: float, height: float) -> Mesh:
+    """Closed box on the ground (walls and roof)."""
+    vertices = np.array([[x0, y0, 0], [x1, y0, 0], [x1, y1, 0], [x0, y1, 0],
+                         [x0, y0, height], [x1, y0, height], [x1, y1, height], [x0, y1, height]])
+    faces = [[0, 1, 5], [0, 5, 4], [1, 2, 6], [1, 6, 5], [2, 3, 7], [2, 7, 6],
+             [3, 0, 4], [3, 4, 7], [4, 5, 6], [4, 6, 7]]
+    return Mesh(vertices, np.array(faces), f'block-{x0:g}-{y0:g}')
+
+
+def representative_cases() -> list[ConvergenceCase]:
+    """
+    Built-in cases: the normals of `compute_theoretical_bounds` on an open
+    site, and windows facing typical street and courtyard obstructions.
+    """
+    normals = np.array([[0, 0, 1], [1, 0, 1], [1, 0, 0]], dtype=np.float64)
+    open_site = ConvergenceCase('open', np.zeros((3, 3)), normals)
+
+    heights = np.array([1.5, 4.5, 7.5, 10.5])
+    windows = np.stack([np.zeros_like(heights), np.zeros_like(heights), heights], axis=1)
+    facing_east = np.tile([1.0, 0.0, 0.0], (len(heights), 1))
+    street = ConvergenceCase('street', windows, facing_east,
+                             Scene([_block(12, -30, 24, 30, 15)]))
+    courtyard = ConvergenceCase('courtyard', windows, facing_east, Scene([
+        _block(8, -10, 14, 10, 12), _block(-2, 8, 14, 14, 9), _block(-2, -14, 14, -8, 18),
+    ]))
+    return [open_site, street, courtyard]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Richardson Extrapolation
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def resolution_ladder(base: int = LADDER_BASE, levels: int = LADDER_LEVELS,
+                      ratio: int = LADDER_RATIO, aspect: int = ASPECT) -> list[tuple[int, int]]:
+    """(horizontal, vertical) resolutions refined by `ratio` per level."""
+    return [(aspect * base * ratio**i, base * ratio**i) for i in range(levels)]
+
+
+def richardson_extrapolate(values: np.ndarray, ratio: float = LADDER_RATIO
+                           ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Extrapolate a refinement sequence to infinite resolution.
+
+    Args:
+        values: Results per level, coarse to fine, shape (L, N) with L >= 3
+        ratio: Refinement ratio between consecutive levels
+
+    Returns:
+        Tuple of (extrapolated values, observed order, uncertainty), each of
+        shape (N,). Where the last three levels are not in the asymptotic
+        range (differences change sign, or the order falls outside
+        `ORDER_RANGE`, where extrapolation would overshoot) the order is
+        NaN, the finest value is returned and the uncertainty is the last
+        difference; otherwise the uncertainty is 0
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < MIN_LADDER_LEVELS:
+        raise ValueError(f"Richardson extrapolation needs at least {MIN_LADDER_LEVELS} levels, "
+                         f"got {len(values)}")
+    f1, f2, f3 = values[-3:]
+    d1, d2 = f2 - f1, f3 - f2
+    converged = np.abs(d2) < 1e-12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        order = np.log(np.abs(d1 / d2)) / np.log(ratio)
+        asymptotic = (~converged & (d1 * d2 > 0)
+                      & (order >= ORDER_RANGE[0]) & (order <= ORDER_RANGE[1]))
+        order = np.where(asymptotic, order, np.nan)
+        extrapolated = np.where(asymptotic, f3 + d2 / (ratio**order - 1), f3)
+    uncertainty = np.where(asymptotic | converged, 0.0, np.abs(d2))
+    return extrapolated, order, uncertainty
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Study
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def run_study(
+    cases: list[ConvergenceCase] | None = None,
+    ladder: list[tuple[int, int]] | None = None,
+    candidates: list[tuple[int, int]] | None = None,
+    target_error: float = DEFAULT_TARGET_ERROR,
+    ratio: int = LADDER_RATIO,
+    **options,
+) -> dict:
+    """
+    Evaluate cases over a resolution ladder and recommend a resolution.
+
+    Args:
+        cases: Cases to evaluate (default: `representative_cases()`)
+        ladder: Resolutions for the extrapolation, refined by `ratio`
+        candidates: Further resolutions to assess against the extrapolated
+            values (default: the production 180×45 grid)
+        target_error: Largest acceptable |VSC − converged VSC| (percentage
+            points) over all points of all cases
+        ratio: Refinement ratio of `ladder`
+        **options: Forwarded to `compute_vsc_batch` (sky model, ray offset)
+
+    Returns:
+        JSON-serialisable report: per-resolution worst error and run time,
+        per-case orders, and the recommended resolution (None if no
+        resolution meets the target)
+    """
+    cases = cases if cases is not None else representative_cases()
+    ladder = ladder if ladder is not None else resolution_ladder(ratio=ratio)
+    candidates = candidates if candidates is not None else [
+        (HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION)]
+    resolutions = list(dict.fromkeys(ladder + candidates))
+
+    values, seconds = {}, {}
+    for resolution in resolutions:
+        start = time.perf_counter()
+        values[resolution] = [compute_vsc_batch(case.points, case.normals, case.scene,
+                                                horizontal_resolution=resolution[0],
+                                                vertical_resolution=resolution[1], **options)
+                              for case in cases]
+        seconds[resolution] = time.perf_counter() - start
+
+    report_cases = []
+    errors = {resolution: 0.0 for resolution in resolutions}
+    for i, case in enumerate(cases):
+        converged, order, uncertainty = richardson_extrapolate(
+            np.stack([values[resolution][i] for resolution in ladder]), ratio)
+        for resolution in resolutions:
+            error = np.abs(values[resolution][i] - converged) + uncertainty
+            errors[resolution] = max(errors[resolution], float(np.max(error)))
+        report_cases.append({
+            'name': case.name, 'converged': converged.tolist(),
+            'order': [None if np.isnan(p) else float(p) for p in order],
+            'uncertainty': uncertainty.tolist(),
+        })
+
+    table = sorted(({'horizontal_resolution': h, 'vertical_resolution': v, 'rays': h * v,
+                     'max_error': errors[(h, v)], 'seconds': seconds[(h, v)]}
+                    for h, v in resolutions), key=lambda row: row['rays'])
+    meeting = [row for row in table if row['max_error'] <= target_error]
+    recommended = None
+    if meeting:
+        recommended = {key: meeting[0][key] for key in ('horizontal_resolution', 'vertical_resolution')}
+
+    return {'target_error': target_error, 'ratio': ratio, 'options': options,
+            'resolutions': table, 'cases': report_cases, 'recommended': recommended}
+
+
+def save_study(report: dict, path: str | os.PathLike = RESOLUTION_FILE) -> None:
+    """Write a study report as JSON (atomically, so readers never see half a file)."""
+    path = os.fspath(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(f'{path}.tmp', path)
+
+
+def recommended_resolution(path: str | os.PathLike = RESOLUTION_FILE,
+                           target_error: float | None = None) -> dict[str, int]:
+    """
+    Resolution keyword arguments for production runs.
+
+    Args:
+        path: Study report written by `save_study`
+        target_error: Pick the cheapest resolution in the report meeting
+            this error instead of the one recommended when it was saved
+
+    Returns:
+        {'horizontal_resolution': ..., 'vertical_resolution': ...}; the
+        `main.py` constants if there is no report or nothing meets the target
+    """
+    fallback = {'horizontal_resolution': HORIZONTAL_ANGLE_RESOLUTION,
+                'vertical_resolution': VERTICAL_ANGLE_RESOLUTION}
+    try:
+        with open(path) as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return fallback
+
+    if target_error is None:
+        return report.get('recommended') or fallback
+    for row in report['resolutions']:  # Sorted by ray count
+        if row['max_error'] <= target_error:
+            return {key: row[key] for key in fallback}
+    return fallback
+
+
+def print_study(report: dict) -> None:
+    """Print the resolution table and recommendation."""
+    print("\n📐 RESOLUTION CONVERGENCE:")
+    print(f"   {'H×V':>9} {'rays':>7} {'max error':>10} {'time':>8}")
+    for row in report['resolutions']:
+        marker = '✓' if row['max_error'] <= report['target_error'] else ' '
+        print(f" {marker} {row['horizontal_resolution']:>4}×{row['vertical_resolution']:<4} "
+              f"{row['rays']:>7} {row['max_error']:>9.3f}% {row['seconds']:>7.2f}s")
+
+    for case in report['cases']:
+        orders = [p for p in case['order'] if p is not None]
+        observed = f"observed order {np.median(orders):.2f}" if orders else "not in asymptotic range"
+        print(f"   • {case['name']}: {observed}")
+
+    recommended = report['recommended']
+    if recommended is None:
+        print(f"\n⚠️  No resolution meets the target error of {report['target_error']}%")
+    else:
+        print(f"\n✅ Cheapest resolution within {report['target_error']}%: "
+              f"{recommended['horizontal_resolution']}×{recommended['vertical_resolution']}")
+
+
+def _ladder_levels(text: str) -> int:
+    levels = int(text)
+    if levels < MIN_LADDER_LEVELS:
+        raise argparse.ArgumentTypeError(f"needs at least {MIN_LADDER_LEVELS} levels, got {levels}")
+    return levels
+
+
+def main():
+    """Command line entry point for the convergence study."""
+    parser = argparse.ArgumentParser(description="Find the cheapest hemisphere resolution "
+                                                 "within a target VSC error")
+    parser.add_argument('--target', type=float, default=DEFAULT_TARGET_ERROR,
+                        help="largest acceptable VSC error in percentage points")
+    parser.add_argument('--base', type=int, default=LADDER_BASE,
+                        help="elevation samples on the coarsest ladder level")
+    parser.add_argument('--levels', type=_ladder_levels, default=LADDER_LEVELS,
+                        help=f"ladder levels for the extrapolation (at least {MIN_LADDER_LEVELS})")
+    parser.add_argument('--scene', help="evaluate this scene file instead of the built-in cases")
+    parser.add_argument('--points', help=".npy observation points for --scene")
+    parser.add_argument('--normals', help=".npy surface normals for --scene")
+    parser.add_argument('--output', default=RESOLUTION_FILE, help="where to save the report")
+    args = parser.parse_args()
+
+    cases = None
+    if args.scene:
+        if not (args.points and args.normals):
+            parser.error("--scene needs --points and --normals")
+        from scene_format import open_scene
+        cases = [ConvergenceCase(os.path.basename(args.scene), np.load(args.points),
+                                 np.load(args.normals), open_scene(args.scene))]
+
+    report = run_study(cases, resolution_ladder(args.base, args.levels), target_error=args.target)
+    print_study(report)
+    save_study(report, args.output)
+    print(f"   Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+Distance Culling and Far-Field Horizon Rings
+
+Keeps the per-point cost of `compute_vsc_batch` roughly constant as the site
+model grows from a block to a district: observation points are grouped into
+spatial tiles, and every mesh is classified per tile by how large it can
+appear from anywhere in that tile.
+
+Key concepts:
+- The scene's BVH is built once; every tile traces against it with a mask
+  of the meshes that concern it, and subtrees without any are skipped
+- *Culled*: the mesh never rises above the lowest sample elevation
+  (DELTA_THETA / 2) as seen from the tile, or lies behind the surface plane
+  of every point in it, so no sample ray can hit it. This is exact
+- *Envelope*: per sample azimuth, the highest elevation any remaining mesh
+  box can reach from the tile. Rays above it see the sky without being
+  traced. Also exact
+- *Far*: seen from the mesh, the whole tile spans at most one sky patch
+  (min(DELTA_THETA, DELTA_ALPHA)). Far meshes are traced once from the tile
+  centre into a horizon ring that every point in the tile reuses. Tiles
+  with only a few points skip the ring: their rays are traced exactly, all
+  in one packet
+- *Near*: everything else is traced per point as usual
+- Moving the viewpoint within the tile shifts far geometry by at most the
+  tile's parallax angle, so only samples that a far mesh can reach and that
+  lie within that angle (plus one sample) of an unblocked ring sample can
+  differ from an exact trace; their total weight is reported as a per-point
+  upper bound on the VSC error
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from batch import CIE_SKY_MULTIPLIER, ORIGIN_OFFSET, _normalize, hemisphere_directions, sky_weights
+from main import HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION
+from obstruction import FlatBVH, Scene, trace_occlusion
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+DEFAULT_TILE_SIZE = 25.0   # Tile edge length in scene units (metres), XY plane
+RING_MIN_POINTS = 4        # Below this, tracing far meshes per point beats building a ring
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Observation Tiles
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class ObservationTile:
+    """
+    Observation points sharing one obstruction classification.
+
+    Attributes:
+        key: (column, row) of the tile on the XY grid
+        indices: Indices of the tile's points in the full point array
+        center: Centre of the points' bounding box, shape (3,)
+        radius: Distance from `center` to the farthest point
+    """
+    key: tuple[int, int]
+    indices: np.ndarray
+    center: np.ndarray
+    radius: float
+
+
+def partition_tiles(points: np.ndarray, tile_size: float = DEFAULT_TILE_SIZE) -> list[ObservationTile]:
+    """
+    Group points into square XY tiles.
+
+    Args:
+        points: Observation points (or ray origins), shape (N, 3)
+        tile_size: Tile edge length
+
+    Returns:
+        Non-empty tiles, ordered by key
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    cells = np.floor(points[:, :2] / tile_size).astype(np.int64)
+    keys, inverse = np.unique(cells, axis=0, return_inverse=True)
+    order = np.argsort(inverse.reshape(-1), kind='stable')
+    bounds = np.searchsorted(inverse.reshape(-1)[order], np.arange(len(keys) + 1))
+
+    tiles = []
+    for i, key in enumerate(keys):
+        indices = order[bounds[i]:bounds[i + 1]]
+        tile_points = points[indices]
+        center = (tile_points.min(axis=0) + tile_points.max(axis=0)) / 2
+        radius = float(np.max(np.linalg.norm(tile_points - center, axis=1)))
+        tiles.append(ObservationTile((int(key[0]), int(key[1])), indices, center, radius))
+    return tiles
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Mesh Classification
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _mesh_boxes(scene: Scene) -> tuple[np.ndarray, np.ndarray]:
+    """Bounding boxes of all meshes as (min corners, max corners), each (M, 3)."""
+    if not scene.meshes:
+        return np.empty((0, 3)), np.empty((0, 3))
+    boxes = [m.bounds() if len(m.triangles) else (np.full(3, np.inf), np.full(3, -np.inf))
+             for m in scene.meshes]
+    return np.array([b[0] for b in boxes]), np.array([b[1] for b in boxes])
+
+
+def max_elevations(tile: ObservationTile, boxes: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """
+    Highest elevation (radians) at which any point of the tile can see each box.
+
+    Sample rays above this elevation cannot hit the mesh, so they need not
+    be traced against it.
+
+    Returns:
+        Elevation per mesh, shape (M,); -π/2 for meshes without triangles
+    """
+    box_min, box_max = boxes
+    nearest = np.clip(tile.center, box_min, box_max)
+    horizontal = np.maximum(np.linalg.norm((nearest - tile.center)[:, :2], axis=1) - tile.radius, 0.0)
+    rise = box_max[:, 2] - (tile.center[2] - tile.radius)
+    with np.errstate(invalid='ignore'):
+        elevation = np.where(horizontal > 0, np.arctan2(rise, horizontal), np.pi / 2)
+    return np.where(box_min[:, 0] > box_max[:, 0], -np.pi / 2, elevation)
+
+
+def behind_surfaces(boxes: tuple[np.ndarray, np.ndarray], origins: np.ndarray,
+                    normals: np.ndarray) -> np.ndarray:
+    """
+    Meshes entirely behind the surface plane of every ray origin.
+
+    Sample rays only leave into the front half-space (n·d > 0), so such a
+    mesh cannot be hit, e.g. the building a facade's windows belong to.
+
+    Args:
+        boxes: Mesh bounding boxes from `_mesh_boxes`
+        origins: Ray origins of a tile, shape (N, 3)
+        normals: Their unit surface normals, shape (N, 3)
+
+    Returns:
+        Boolean mask of shape (M,)
+    """
+    box_min, box_max = boxes
+    center, half = (box_min + box_max) / 2, (box_max - box_min) / 2
+    # Farthest box corner along each normal, relative to the origin's plane
+    reach = (normals @ center.T - np.sum(normals * origins, axis=1)[:, None]
+             + np.abs(normals) @ half.T)
+    with np.errstate(invalid='ignore'):
+        return np.all(reach <= 0, axis=0)
+
+
+def _wrap(angle: np.ndarray) -> np.ndarray:
+    """Wrap angles into [-π, π)."""
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+def azimuth_ranges(tile: ObservationTile, boxes: tuple[np.ndarray, np.ndarray],
+                   horizontal_resolution: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sample azimuths at which each box can be met from some point of the tile.
+
+    The box's azimuth span seen from the tile centre is widened by the
+    parallax of the tile radius at the box's horizontal distance; a box
+    around the tile in plan covers every azimuth.
+
+    Args:
+        tile: Observation tile
+        boxes: Mesh bounding boxes from `_mesh_boxes`
+        horizontal_resolution: Number of azimuth samples
+
+    Returns:
+        Tuple of (first azimuth index, number of consecutive indices,
+        wrapping around), each of shape (M,)
+    """
+    box_min, box_max = boxes[0][:, :2], boxes[1][:, :2]
+    center = tile.center[:2]
+    corners = np.stack([box_min, np.stack([box_max[:, 0], box_min[:, 1]], axis=1),
+                        box_max, np.stack([box_min[:, 0], box_max[:, 1]], axis=1)], axis=1) - center
+    delta_alpha = (2 * np.pi) / horizontal_resolution
+    with np.errstate(invalid='ignore', divide='ignore'):
+        middle = (box_min + box_max) / 2 - center
+        heading = np.arctan2(middle[:, 1], middle[:, 0])
+        spread = _wrap(np.arctan2(corners[..., 1], corners[..., 0]) - heading[:, None])
+        distance = np.linalg.norm(np.clip(center, box_min, box_max) - center, axis=1)
+        widen = np.arcsin(np.clip(tile.radius / distance, 0.0, 1.0))
+        first = np.ceil((heading + spread.min(axis=1) - widen) / delta_alpha - 1e-9)
+        last = np.floor((heading + spread.max(axis=1) + widen) / delta_alpha + 1e-9)
+    count = np.clip(last - first + 1, 0, horizontal_resolution)
+    count[distance <= tile.radius] = horizontal_resolution
+    first = np.where(np.isfinite(first), first, 0)
+    return first.astype(np.int64) % horizontal_resolution, np.nan_to_num(count).astype(np.int64)
+
+
+def horizon_envelope(ranges: tuple[np.ndarray, np.ndarray], elevations: np.ndarray,
+                     mask: np.ndarray, horizontal_resolution: int) -> np.ndarray:
+    """
+    Highest elevation any selected mesh can reach, per sample azimuth.
+
+    Args:
+        ranges: `azimuth_ranges` of the tile
+        elevations: `max_elevations` of the tile, shape (M,)
+        mask: Meshes to include, shape (M,)
+        horizontal_resolution: Number of azimuth samples
+
+    Returns:
+        Elevation bound in radians per azimuth, shape (H,); -π/2 where no
+        selected mesh can be met
+    """
+    first, count = ranges[0][mask], ranges[1][mask]
+    envelope = np.full(horizontal_resolution, -np.pi / 2)
+    steps = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    np.maximum.at(envelope, (np.repeat(first, count) + steps) % horizontal_resolution,
+                  np.repeat(elevations[mask], count))
+    return envelope
+
+
+def classify_meshes(
+    tile: ObservationTile,
+    boxes: tuple[np.ndarray, np.ndarray],
+    lowest_elevation: float,
+    tolerance: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Classify mesh bounding boxes as near, far or culled for one tile.
+
+    Args:
+        tile: Observation tile (centre and radius of its ray origins)
+        boxes: Mesh bounding boxes from `_mesh_boxes`
+        lowest_elevation: Elevation (radians) of the lowest sample ring
+        tolerance: Largest parallax (radians) accepted for far meshes
+
+    Returns:
+        Tuple of (near mask, far mask, parallax per mesh in radians), each
+        of shape (M,); meshes in neither mask are culled
+    """
+    box_min, box_max = boxes
+    culled = max_elevations(tile, boxes) < lowest_elevation
+
+    nearest = np.clip(tile.center, box_min, box_max)
+    distance = np.linalg.norm(nearest - tile.center, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        parallax = np.where(distance > tile.radius,
+                            np.arcsin(np.clip(tile.radius / distance, 0.0, 1.0)), np.pi)
+    far = ~culled & (parallax <= tolerance)
+    return ~culled & ~far, far, parallax
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Horizon Rings
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class HorizonRing:
+    """
+    Far-field occlusion of every sky sample, seen from a tile centre.
+
+    Attributes:
+        blocked: Mask over the hemisphere samples, shape (H * V,) in the
+            azimuth-major order of `hemisphere_directions`
+        horizontal_resolution: Number of azimuth samples
+        vertical_resolution: Number of elevation samples
+        parallax: Angular uncertainty (radians) for points off the centre
+        candidates: Samples a far mesh can meet from some point of the tile,
+            shape (H * V,); None if unknown (every sample)
+    """
+    blocked: np.ndarray
+    horizontal_resolution: int
+    vertical_resolution: int
+    parallax: float
+    candidates: np.ndarray | None = None
+
+    def _grid(self, mask: np.ndarray) -> np.ndarray:
+        return mask.reshape(self.horizontal_resolution, self.vertical_resolution)
+
+    def _dilate(self, mask: np.ndarray) -> np.ndarray:
+        """Grow the mask by `parallax` plus one sample in elevation and (per ring) in azimuth."""
+        h_res, v_res = self.horizontal_resolution, self.vertical_resolution
+        delta_theta, delta_alpha = (np.pi / 2) / v_res, (2 * np.pi) / h_res
+        grown = mask.copy()
+        for step in range(1, int(np.ceil(self.parallax / delta_theta - 1e-9)) + 2):
+            grown[:, step:] |= mask[:, :-step]
+            grown[:, :-step] |= mask[:, step:]
+
+        # An angular shift ε moves a sample at elevation θ by ε / cos(θ) in azimuth
+        theta = np.linspace(delta_theta / 2, np.pi / 2 - delta_theta / 2, v_res)
+        reach = np.minimum(np.ceil(self.parallax / (delta_alpha * np.cos(theta)) - 1e-9) + 1,
+                           h_res // 2).astype(int)
+        result = grown.copy()
+        for step in range(1, reach.max(initial=0) + 1):
+            rings = reach >= step
+            result[:, rings] |= (np.roll(grown, step, axis=0) | np.roll(grown, -step, axis=0))[:, rings]
+        return result
+
+    def uncertain(self) -> np.ndarray:
+        """
+        Samples whose far-field occlusion may differ for points off the centre.
+
+        A far mesh can be missed by the ring (narrower than a sample) or
+        shifted by up to `parallax`, so every candidate sample within
+        `parallax` plus one sample of an unblocked ring sample is uncertain.
+        Blocked samples further inside the silhouette are taken as blocked
+        everywhere, assuming gaps in far-field geometry span at least one
+        sample, as the lattice itself does.
+
+        Returns:
+            Mask of shape (H * V,)
+        """
+        if self.blocked.all():
+            return np.zeros_like(self.blocked)
+        candidates = self.candidates if self.candidates is not None else np.ones_like(self.blocked)
+        return candidates & self._dilate(self._grid(~self.blocked)).reshape(-1)
+
+    @property
+    def profile(self) -> np.ndarray:
+        """Far-field horizon per azimuth in degrees (upper edge of the highest blocked sample)."""
+        top_edge = (np.arange(self.vertical_resolution) + 1) * 90.0 / self.vertical_resolution
+        return np.max(np.where(self._grid(self.blocked), top_edge, 0.0), axis=1)
+
+
+def build_horizon_ring(
+    bvh: FlatBVH,
+    triangle_mask: np.ndarray | None,
+    center: np.ndarray,
+    parallax: float = 0.0,
+    candidates: np.ndarray | None = None,
+    horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+    vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION,
+) -> HorizonRing:
+    """
+    Trace the far-field meshes once from a tile centre.
+
+    Args:
+        bvh: BVH of the whole scene, shared by all tiles
+        triangle_mask: Far-field triangles of the tile (BVH order); None for all
+        center: Tile centre, shape (3,)
+        parallax: Angular uncertainty for points off the centre (radians)
+        candidates: Samples that can meet a far-field mesh at all, e.g.
+            below its `horizon_envelope`, shape (H * V,); None traces all
+        horizontal_resolution: Number of azimuth samples
+        vertical_resolution: Number of elevation samples
+
+    Returns:
+        Horizon ring of the tile
+    """
+    directions, _ = hemisphere_directions(horizontal_resolution, vertical_resolution)
+    blocked = np.zeros(len(directions), dtype=bool)
+    traced = np.flatnonzero(candidates) if candidates is not None else np.arange(len(directions))
+    if len(traced) and (triangle_mask is None or triangle_mask.any()):
+        origins = np.broadcast_to(np.asarray(center, dtype=np.float64), (len(traced), 3))
+        blocked[traced] = trace_occlusion(bvh, origins, directions[traced],
+                                          triangle_mask=triangle_mask)
+    return HorizonRing(blocked, horizontal_resolution, vertical_resolution, parallax, candidates)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Culled VSC
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def compute_vsc_culled(
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    tile_size: float = DEFAULT_TILE_SIZE,
+    tolerance: float | None = None,
+    horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+    vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+    origin_offset: float = ORIGIN_OFFSET,
+    ring_min_points: int = RING_MIN_POINTS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    `compute_vsc_batch` with per-tile culling and far-field horizon rings.
+
+    The scene's BVH is built once; each tile traces against it with a mask
+    of the meshes that concern it.
+
+    Args:
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3); normalised internally
+        scene: Obstruction scene, or None for an unobstructed sky
+        tile_size: Tile edge length; smaller tiles push more meshes into
+            the far field but trace more horizon rings
+        tolerance: Largest parallax (radians) for far meshes; defaults to
+            one sky patch, min(DELTA_THETA, DELTA_ALPHA). Use 0 to disable
+            the far field and keep only exact culling
+        horizontal_resolution: Number of azimuth samples
+        vertical_resolution: Number of elevation samples
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ)
+        origin_offset: Distance to lift ray origins off the surface
+        ring_min_points: Tiles with fewer points trace their far meshes per
+            point (exactly) instead of building a horizon ring
+
+    Returns:
+        Tuple of (VSC values, upper bound on |VSC - exact VSC|), both in
+        percent with shape (N,). The bound is 0 wherever no far-field mesh
+        was approximated.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = _normalize(normals)
+    directions, solid_angles = hemisphere_directions(horizontal_resolution, vertical_resolution)
+    sample_azimuth = np.arange(len(directions)) // vertical_resolution
+    sample_elevation = np.arcsin(directions[:, 2])
+    delta_theta = (np.pi / 2) / vertical_resolution
+    delta_alpha = (2 * np.pi) / horizontal_resolution
+    if tolerance is None:
+        tolerance = min(delta_theta, delta_alpha)
+
+    scene = scene if scene is not None else Scene()
+    weights = sky_weights(normals, directions, solid_angles, sky_multiplier)
+    visible = weights > 0
+    error = np.zeros(len(points))
+    if scene.triangle_count == 0:
+        return np.sum(weights * visible, axis=1), error
+
+    bvh = scene.bvh
+    triangle_meshes = scene.triangle_mesh_ids()[bvh.triangle_ids]  # Mesh of each BVH triangle
+    boxes = _mesh_boxes(scene)
+    origins = points + origin_offset * normals
+    exact_points, exact_dirs = [], []   # Rays of tiles without a ring, traced in one packet
+
+    for tile in partition_tiles(origins, tile_size):
+        idx = tile.indices
+        near, far, parallax = classify_meshes(tile, boxes, delta_theta / 2, tolerance)
+        behind = behind_surfaces(boxes, origins[idx], normals[idx])
+        near, far = near & ~behind, far & ~behind
+        if len(idx) < ring_min_points:
+            near, far = near | far, np.zeros_like(far)
+        ranges = azimuth_ranges(tile, boxes, horizontal_resolution)
+        reach = max_elevations(tile, boxes)
+
+        # Samples above the box envelope of a subset cannot meet any of its meshes
+        envelope = horizon_envelope(ranges, reach, near, horizontal_resolution)
+        near_candidates = sample_elevation <= envelope[sample_azimuth]
+        if not far.any():
+            point_idx, dir_idx = np.nonzero(visible[idx] & near_candidates)
+            exact_points.append(idx[point_idx])
+            exact_dirs.append(dir_idx)
+            continue
+
+        envelope = horizon_envelope(ranges, reach, far, horizontal_resolution)
+        far_candidates = sample_elevation <= envelope[sample_azimuth]
+        ring = build_horizon_ring(bvh, far[triangle_meshes], tile.center,
+                                  float(parallax[far].max()), far_candidates,
+                                  horizontal_resolution, vertical_resolution)
+        # Near-field rays are also traced in the uncertain band, so that
+        # samples hidden by near geometry do not count towards the bound
+        uncertain = ring.uncertain()
+        tile_visible = visible[idx]
+        traced = tile_visible & (~ring.blocked | uncertain) & near_candidates
+        point_idx, dir_idx = np.nonzero(traced)
+        if near.any() and len(point_idx):
+            blocked = trace_occlusion(bvh, origins[idx[point_idx]], directions[dir_idx],
+                                      triangle_mask=near[triangle_meshes])
+            tile_visible[point_idx[blocked], dir_idx[blocked]] = False
+        error[idx] = np.sum(weights[idx] * (tile_visible & uncertain), axis=1)
+        visible[idx] = tile_visible & ~ring.blocked
+
+    # Culled meshes cannot meet these rays, so the full scene gives the same answer
+    if exact_points:
+        point_idx, dir_idx = np.concatenate(exact_points), np.concatenate(exact_dirs)
+        blocked = trace_occlusion(bvh, origins[point_idx], directions[dir_idx])
+        visible[point_idx[blocked], dir_idx[blocked]] = False
+
+    return np.sum(weights * visible, axis=1), error
@@ -0,0 +1,328 @@
+"""
+Asynchronous VSC Jobs
+
+An asyncio-friendly job interface for running VSC computations from a web
+service without blocking request threads. It is the local, in-process
+stand-in for the external GPU worker queue described in `info-vsc.md`.
+
+Key concepts:
+- A job splits its observation points into chunks
+- Chunks run on a process (or thread) pool, never on the event loop
+- Each finished chunk is streamed as a `ChunkResult` progress event
+- Cancelling a job drops all chunks that have not started yet
+- A scene given as a path to a binary scene file is memory-mapped by each
+  worker instead of being pickled with every chunk
+- With a `ResultCache`, points computed by earlier jobs are served from disk
+  and only the missing ones are sent to the pool
+- The runner forgets a job once its result has been retrieved, or `job_ttl`
+  seconds after it finished, so a long-running service does not keep every
+  result in memory
+
+Example:
+    async with VSCJobRunner() as runner:
+        job = runner.submit(points, normals, scene=scene)
+        async for chunk in job.events():
+            print(f"{chunk.completed}/{chunk.total} points done")
+        vsc = await job.result()
+"""
+
+import asyncio
+import itertools
+import os
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from batch import DEFAULT_CHUNK_SIZE, compute_vsc_batch
+from cache import ResultCache, context_digest, point_keys
+from obstruction import Scene
+from scene_format import open_scene
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+DEFAULT_JOB_TTL = 600.0   # Seconds a finished job stays registered if nobody fetches its result
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Job Events
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class ChunkResult:
+    """
+    Progress event carrying the results of one finished chunk.
+
+    Attributes:
+        job_id: Identifier of the job the chunk belongs to
+        indices: Indices of the chunk's points within the job
+        values: VSC values (percentage) for points[indices]
+        completed: Number of points finished so far, including this chunk
+        total: Total number of points in the job
+        cached: True if the values were served from the result cache
+    """
+    job_id: str
+    indices: np.ndarray
+    values: np.ndarray
+    completed: int
+    total: int
+    cached: bool = False
+
+    @property
+    def progress(self) -> float:
+        """Fraction of points finished, between 0 and 1."""
+        return self.completed / self.total if self.total else 1.0
+
+
+def _run_chunk(points: np.ndarray, normals: np.ndarray, scene: Scene | str | None,
+               options: dict) -> np.ndarray:
+    """Worker entry point; top-level so it can be pickled to a process pool."""
+    if isinstance(scene, str):
+        scene = open_scene(scene)
+    return compute_vsc_batch(points, normals, scene, **options)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Jobs
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class VSCJob:
+    """
+    Handle to a running VSC computation.
+
+    Created by `VSCJobRunner.submit`; do not instantiate directly.
+    """
+
+    def __init__(self, job_id: str, total: int):
+        self.job_id = job_id
+        self.total = total
+        self.completed = 0
+        self._values = np.full(total, np.nan)
+        self._events: asyncio.Queue[ChunkResult | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._on_retrieved: Callable[[], None] | None = None  # Set by the runner
+
+    @property
+    def progress(self) -> float:
+        """Fraction of points finished, between 0 and 1."""
+        return self.completed / self.total if self.total else 1.0
+
+    def done(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    def cancelled(self) -> bool:
+        return self._task is not None and self._task.cancelled()
+
+    def cancel(self) -> bool:
+        """
+        Request cancellation.
+
+        Chunks that have not started are dropped; chunks already running in
+        the pool finish in the background and their results are discarded.
+
+        Returns:
+            False if the job had already finished, True otherwise
+        """
+        if self._task is None or self._task.done():
+            return False
+        return self._task.cancel()
+
+    async def events(self) -> AsyncIterator[ChunkResult]:
+        """
+        Stream chunk results as they finish (in completion order).
+
+        The iteration ends when the job completes, fails or is cancelled.
+        Intended for a single consumer.
+        """
+        while True:
+            event = await self._events.get()
+            if event is None:
+                return
+            yield event
+
+    async def result(self) -> np.ndarray:
+        """
+        Wait for the job and return VSC values for all points.
+
+        Once the job has finished, the runner forgets it; the values stay
+        available through this handle.
+
+        Raises:
+            asyncio.CancelledError: If the job was cancelled
+            Exception: Whatever a worker raised while computing a chunk
+        """
+        try:
+            await asyncio.shield(self._task)
+        finally:
+            if self.done() and self._on_retrieved is not None:
+                self._on_retrieved()
+        return self._values
+
+    def partial_result(self) -> np.ndarray:
+        """Values computed so far; unfinished points are NaN."""
+        return self._values.copy()
+
+
+class VSCJobRunner:
+    """
+    Runs VSC jobs on a worker pool from asyncio code.
+
+    Args:
+        executor: Pool to run chunks on. Defaults to a ProcessPoolExecutor
+            owned (and shut down) by the runner.
+        max_in_flight: Maximum chunks submitted to the pool per job at once.
+            Keeps cancellation responsive and memory bounded. Defaults to
+            twice the worker count of an owned pool, or of the CPU count for
+            a supplied executor.
+        cache: Optional persistent result cache shared by all jobs
+        job_ttl: Seconds a finished job stays in `jobs` if its result is
+            never retrieved; None keeps it until `forget`
+    """
+
+    def __init__(self, executor: Executor | None = None, max_in_flight: int | None = None,
+                 cache: ResultCache | None = None, job_ttl: float | None = DEFAULT_JOB_TTL):
+        self.cache = cache
+        self.job_ttl = job_ttl
+        self._owns_executor = executor is None
+        workers = os.process_cpu_count() or 1
+        self._executor = executor or ProcessPoolExecutor(max_workers=workers)
+        self._max_in_flight = max_in_flight or workers * 2
+        self._ids = itertools.count(1)
+        self.jobs: dict[str, VSCJob] = {}
+        self._expiry: dict[str, asyncio.TimerHandle] = {}
+
+    async def __aenter__(self) -> 'VSCJobRunner':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Cancel outstanding jobs and shut down an owned executor."""
+        for job in list(self.jobs.values()):
+            job.cancel()
+        for handle in self._expiry.values():
+            handle.cancel()
+        self._expiry.clear()
+        if self._owns_executor:
+            await asyncio.to_thread(self._executor.shutdown, True, cancel_futures=True)
+
+    def submit(
+        self,
+        points: np.ndarray,
+        normals: np.ndarray,
+        scene: Scene | str | os.PathLike | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        **options,
+    ) -> VSCJob:
+        """
+        Start computing the VSC for a set of observation points.
+
+        Must be called from a running event loop.
+
+        Args:
+            points: Observation points, shape (N, 3)
+            normals: Surface normals, shape (N, 3)
+            scene: Obstruction scene, path to a binary scene file, or None
+                for an unobstructed sky
+            chunk_size: Number of points per chunk (and per progress event)
+            **options: Forwarded to `compute_vsc_batch` (resolution, sky model, ...)
+
+        Returns:
+            Handle for awaiting, streaming and cancelling the job
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+        if len(points) != len(normals):
+            raise ValueError(f"got {len(points)} points but {len(normals)} normals")
+
+        if isinstance(scene, (str, os.PathLike)):
+            scene = os.path.abspath(scene)
+        elif scene is not None:
+            scene.bvh  # Build once here rather than once per chunk in the workers
+
+        job = VSCJob(f"vsc-{next(self._ids)}", len(points))
+        job._task = asyncio.get_running_loop().create_task(
+            self._run(job, points, normals, scene, chunk_size, options))
+        job._on_retrieved = lambda: self.forget(job.job_id)
+        job._task.add_done_callback(lambda _: self._schedule_expiry(job.job_id))
+        self.jobs[job.job_id] = job
+        return job
+
+    def forget(self, job_id: str) -> VSCJob | None:
+        """
+        Remove a job from the registry, cancelling it if it is still running.
+
+        Returns:
+            The forgotten job, or None if no job has that id
+        """
+        handle = self._expiry.pop(job_id, None)
+        if handle is not None:
+            handle.cancel()
+        job = self.jobs.pop(job_id, None)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _schedule_expiry(self, job_id: str) -> None:
+        if self.job_ttl is None or job_id not in self.jobs:
+            return
+        loop = asyncio.get_running_loop()
+        self._expiry[job_id] = loop.call_later(self.job_ttl, self.forget, job_id)
+
+    def _emit(self, job: VSCJob, indices: np.ndarray, values: np.ndarray,
+              cached: bool = False) -> None:
+        job._values[indices] = values
+        job.completed += len(indices)
+        job._events.put_nowait(ChunkResult(job.job_id, indices, values,
+                                           job.completed, job.total, cached))
+
+    async def _run(self, job: VSCJob, points: np.ndarray, normals: np.ndarray,
+                   scene: Scene | str | None, chunk_size: int, options: dict) -> None:
+        loop = asyncio.get_running_loop()
+        todo = np.arange(len(points))
+        keys: list[bytes] = []
+        pending: dict[asyncio.Future, np.ndarray] = {}
+
+        def submit_next() -> bool:
+            nonlocal todo
+            if len(todo) == 0:
+                return False
+            indices, todo = todo[:chunk_size], todo[chunk_size:]
+            future = loop.run_in_executor(self._executor, _run_chunk,
+                                          points[indices], normals[indices],
+                                          scene, options)
+            pending[future] = indices
+            return True
+
+        try:
+            if self.cache is not None:
+                scene_data = open_scene(scene) if isinstance(scene, str) else scene
+                context = await asyncio.to_thread(context_digest, scene_data, **options)
+                keys = await asyncio.to_thread(point_keys, context, points, normals)
+                cached = await asyncio.to_thread(self.cache.get_many, keys)
+                hits = np.isfinite(cached)
+                if hits.any():
+                    self._emit(job, np.flatnonzero(hits), cached[hits], cached=True)
+                todo = np.flatnonzero(~hits)
+
+            while len(pending) < self._max_in_flight and submit_next():
+                pass
+            while pending:
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    indices = pending.pop(future)
+                    values = future.result()
+                    self._emit(job, indices, values)
+                    if self.cache is not None:
+                        finite = np.isfinite(values)  # NaN (zero normal) is never cached
+                        await asyncio.to_thread(self.cache.put_many,
+                                                [keys[i] for i in indices[finite]], values[finite])
+                    submit_next()
+        finally:
+            for future in pending:
+                future.cancel()
+            job._events.put_nowait(None)
@@ -8,8 +8,14 @@ Key concepts:
 - CIE Standard Overcast Sky: L(ε) = Lz · (1 + 2·sin(ε)) / 3
 - Lambert's Cosine Law: Φ = r · n = cos(θᵢ)
 - Numerical integration over the sky hemisphere
+
+Run `python main.py --headless --output-dir figures/` to render the figures
+in parallel without opening windows, skipping any that are unchanged.
 """
 
+import argparse
+import os
+
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import cm
@@ -488,8 +494,57 @@ def print_theoretical_analysis():
     print("\n" + "="*70)
 
 
-def main():
+def figure_inputs() -> dict:
+    """
+    Parameters the figures depend on, besides this file's source.
+
+    Used by `render.py` to decide whether a figure must be re-rendered.
+    """
+    return {
+        'horizontal_resolution': HORIZONTAL_ANGLE_RESOLUTION,
+        'vertical_resolution': VERTICAL_ANGLE_RESOLUTION,
+        'ideal_horizontal_sky_component': IDEAL_HORIZONTAL_SKY_COMPONENT,
+        'sky_model': 'CIE standard overcast: 1 + 2·sin(ε)',
+    }
+
+
+def run_headless(output_dir: str, workers: int | None = None, force: bool = False) -> dict[str, float]:
+    """
+    Render all figures concurrently with the Agg backend, without showing them.
+
+    Args:
+        output_dir: Directory to write the PNG files to
+        workers: Number of worker processes (default: one per CPU)
+        force: Re-render even figures whose inputs are unchanged
+
+    Returns:
+        Output path → seconds spent, for the figures actually rendered
+    """
+    from render import VSC_FIGURES, render_figures
+
+    print("\n📈 Generating visualizations (headless)...")
+    rendered = render_figures(VSC_FIGURES, output_dir, workers, skip_unchanged=not force)
+    print(f"\n✅ {len(rendered)} of {len(VSC_FIGURES)} figures rendered into {output_dir}")
+    return rendered
+
+
+def main(argv: list[str] | None = None):
     """Main function to run all visualizations."""
+    parser = argparse.ArgumentParser(description="Visualize the Vertical Sky Component calculation")
+    parser.add_argument('--headless', action='store_true',
+                        help="render figures in parallel with the Agg backend and do not show them")
+    parser.add_argument('--output-dir', default='.',
+                        help="directory to write the PNG files to")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for --headless")
+    parser.add_argument('--force', action='store_true',
+                        help="with --headless, re-render figures even if unchanged")
+    args = parser.parse_args(argv)
+
+    if args.headless:
+        run_headless(args.output_dir, args.workers, args.force)
+        return
+
     print("="*70)
     print("  VERTICAL SKY COMPONENT (VSC) VISUALIZATION")
     print("  Based on CIE Standard Overcast Sky Model")
@@ -500,25 +555,26 @@ def main():
 
     # Generate all plots
     print("\n📈 Generating visualizations...")
+    os.makedirs(args.output_dir, exist_ok=True)
 
     fig1 = plot_cie_luminance_distribution()
-    fig1.savefig('01_cie_luminance_distribution.png', dpi=150, bbox_inches='tight')
+    fig1.savefig(os.path.join(args.output_dir, '01_cie_luminance_distribution.png'), dpi=150, bbox_inches='tight')
     print("   ✓ Saved: 01_cie_luminance_distribution.png")
 
     fig2 = plot_hemisphere_sampling()
-    fig2.savefig('02_hemisphere_sampling.png', dpi=150, bbox_inches='tight')
+    fig2.savefig(os.path.join(args.output_dir, '02_hemisphere_sampling.png'), dpi=150, bbox_inches='tight')
     print("   ✓ Saved: 02_hemisphere_sampling.png")
 
     fig3 = plot_vsc_contribution_map()
-    fig3.savefig('03_vsc_contribution_map.png', dpi=150, bbox_inches='tight')
+    fig3.savefig(os.path.join(args.output_dir, '03_vsc_contribution_map.png'), dpi=150, bbox_inches='tight')
     print("   ✓ Saved: 03_vsc_contribution_map.png")
 
     fig4 = plot_vsc_vs_tilt()
-    fig4.savefig('04_vsc_vs_tilt.png', dpi=150, bbox_inches='tight')
+    fig4.savefig(os.path.join(args.output_dir, '04_vsc_vs_tilt.png'), dpi=150, bbox_inches='tight')
     print("   ✓ Saved: 04_vsc_vs_tilt.png")
 
     fig5 = plot_theoretical_bounds_summary()
-    fig5.savefig('05_theoretical_bounds_summary.png', dpi=150, bbox_inches='tight')
+    fig5.savefig(os.path.join(args.output_dir, '05_theoretical_bounds_summary.png'), dpi=150, bbox_inches='tight')
     print("   ✓ Saved: 05_theoretical_bounds_summary.png")
 
     print("\n✅ All visualizations generated successfully!")
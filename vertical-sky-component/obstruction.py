@@ -0,0 +1,333 @@
+"""
+Obstruction Engine
+
+A small CPU stand-in for the GPU worker described in `info-vsc.md`: triangle
+meshes (buildings, terrain, vegetation) are collected into a scene, indexed
+with a bounding volume hierarchy (BVH), and rays are tested for occlusion.
+
+Key concepts:
+- A ray from an observation point that hits any triangle sees no sky
+- The BVH is stored flattened (plain arrays) so it can be pickled, cached
+  and shared between worker processes cheaply
+- Traversal is vectorised over rays: every node visit tests a whole packet
+"""
+
+import functools
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+BVH_LEAF_SIZE = 8       # Maximum triangles per leaf node
+RAY_EPSILON = 1e-6      # Minimum hit distance (avoids self-intersection)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Scene Description
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class Mesh:
+    """
+    Indexed triangle mesh.
+
+    Attributes:
+        vertices: Vertex positions, shape (V, 3)
+        triangles: Vertex indices per triangle, shape (T, 3)
+        name: Free-form label (e.g. "building-12", "terrain")
+    """
+    vertices: np.ndarray
+    triangles: np.ndarray
+    name: str = ""
+
+    def __post_init__(self):
+        self.vertices = np.ascontiguousarray(self.vertices, dtype=np.float64)
+        self.triangles = np.ascontiguousarray(self.triangles, dtype=np.int64)
+        if self.vertices.ndim != 2 or self.vertices.shape[1] != 3:
+            raise ValueError(f"vertices must have shape (V, 3), got {self.vertices.shape}")
+        if self.triangles.ndim != 2 or self.triangles.shape[1] != 3:
+            raise ValueError(f"triangles must have shape (T, 3), got {self.triangles.shape}")
+
+    def triangle_vertices(self) -> np.ndarray:
+        """Return the corner positions of every triangle, shape (T, 3, 3)."""
+        return self.vertices[self.triangles]
+
+    def bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """Axis-aligned bounding box as (min corner, max corner)."""
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+
+@dataclass
+class FlatBVH:
+    """
+    Bounding volume hierarchy stored as flat arrays.
+
+    Node `i` covers `triangles[start[i]:start[i] + count[i]]` when it is a
+    leaf (`left[i] == -1`); otherwise its children are `left[i]` and
+    `right[i]`. Triangles are stored in BVH order so every leaf references a
+    contiguous range.
+
+    Attributes:
+        bounds_min: Node box minimum corners, shape (M, 3)
+        bounds_max: Node box maximum corners, shape (M, 3)
+        left: Left child index per node (-1 for leaves), shape (M,)
+        right: Right child index per node (-1 for leaves), shape (M,)
+        start: First triangle under each node (leaf or inner), shape (M,)
+        count: Number of triangles in each leaf (0 for inner nodes), shape (M,)
+        triangles: Triangle corners in BVH order, shape (T, 3, 3)
+        triangle_ids: Original scene index of each BVH-ordered triangle, shape (T,)
+    """
+    bounds_min: np.ndarray
+    bounds_max: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    start: np.ndarray
+    count: np.ndarray
+    triangles: np.ndarray
+    triangle_ids: np.ndarray
+
+    @property
+    def node_count(self) -> int:
+        return len(self.left)
+
+    @functools.cached_property
+    def triangle_ranges(self) -> tuple[np.ndarray, np.ndarray]:
+        """(first, end) of the contiguous triangle range under every node, shape (M,) each."""
+        left, right = self.left.tolist(), self.right.tolist()
+        stop = (self.start + self.count).tolist()
+        for node in range(self.node_count - 1, -1, -1):  # Children come after their parent
+            if left[node] >= 0:
+                stop[node] = stop[right[node]]
+        return self.start, np.array(stop, dtype=np.int64)
+
+
+def build_bvh(triangles: np.ndarray, leaf_size: int = BVH_LEAF_SIZE) -> FlatBVH:
+    """
+    Build a BVH over triangles by median split along the longest axis.
+
+    Args:
+        triangles: Triangle corners, shape (T, 3, 3)
+        leaf_size: Maximum number of triangles per leaf
+
+    Returns:
+        Flattened BVH with triangles reordered into leaf order
+    """
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    centroids = triangles.mean(axis=1)
+    tri_min = triangles.min(axis=1)
+    tri_max = triangles.max(axis=1)
+
+    order = np.arange(len(triangles))
+    bounds_min, bounds_max, left, right, start, count = [], [], [], [], [], []
+
+    def new_node(lo: int, hi: int) -> int:
+        ids = order[lo:hi]
+        if len(ids):
+            bounds_min.append(tri_min[ids].min(axis=0))
+            bounds_max.append(tri_max[ids].max(axis=0))
+        else:
+            bounds_min.append(np.full(3, np.inf))
+            bounds_max.append(np.full(3, -np.inf))
+        left.append(-1)
+        right.append(-1)
+        start.append(lo)
+        count.append(hi - lo)
+        return len(left) - 1
+
+    stack = [(new_node(0, len(order)), 0, len(order))]
+    while stack:
+        node, lo, hi = stack.pop()
+        if hi - lo <= leaf_size:
+            continue
+
+        ids = order[lo:hi]
+        extent = centroids[ids].max(axis=0) - centroids[ids].min(axis=0)
+        axis = int(np.argmax(extent))
+        if extent[axis] == 0:
+            continue  # Degenerate cluster, keep as one leaf
+
+        mid = (hi - lo) // 2
+        split = np.argpartition(centroids[ids, axis], mid)
+        order[lo:hi] = ids[split]
+
+        left[node] = new_node(lo, lo + mid)
+        right[node] = new_node(lo + mid, hi)
+        count[node] = 0
+        stack.append((left[node], lo, lo + mid))
+        stack.append((right[node], lo + mid, hi))
+
+    return FlatBVH(
+        bounds_min=np.array(bounds_min, dtype=np.float64).reshape(-1, 3),
+        bounds_max=np.array(bounds_max, dtype=np.float64).reshape(-1, 3),
+        left=np.array(left, dtype=np.int64),
+        right=np.array(right, dtype=np.int64),
+        start=np.array(start, dtype=np.int64),
+        count=np.array(count, dtype=np.int64),
+        triangles=np.ascontiguousarray(triangles[order]),
+        triangle_ids=order.astype(np.int64),
+    )
+
+
+@dataclass
+class Scene:
+    """
+    Collection of obstruction meshes with a lazily built BVH.
+
+    Attributes:
+        meshes: Obstructing meshes (buildings, terrain, vegetation)
+    """
+    meshes: list[Mesh] = field(default_factory=list)
+    _bvh: FlatBVH | None = field(default=None, init=False, repr=False, compare=False)
+
+    def triangles(self) -> np.ndarray:
+        """All triangle corners in mesh order, shape (T, 3, 3)."""
+        if not self.meshes:
+            return np.empty((0, 3, 3))
+        return np.concatenate([m.triangle_vertices() for m in self.meshes])
+
+    def triangle_mesh_ids(self) -> np.ndarray:
+        """Index into `meshes` for every triangle in `triangles()` order."""
+        return np.concatenate([np.full(len(m.triangles), i, dtype=np.int64)
+                               for i, m in enumerate(self.meshes)] or [np.empty(0, np.int64)])
+
+    @property
+    def bvh(self) -> FlatBVH:
+        if self._bvh is None:
+            self._bvh = build_bvh(self.triangles())
+        return self._bvh
+
+    @property
+    def triangle_count(self) -> int:
+        return sum(len(m.triangles) for m in self.meshes)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Ray Queries
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _ray_box_hit(origins: np.ndarray, inv_dirs: np.ndarray,
+                 box_min: np.ndarray, box_max: np.ndarray) -> np.ndarray:
+    """Slab test of rays against one box; returns a hit mask per ray."""
+    with np.errstate(invalid='ignore'):
+        t1 = (box_min - origins) * inv_dirs
+        t2 = (box_max - origins) * inv_dirs
+    # fmin/fmax skip the NaNs produced by 0 * inf for axis-parallel rays
+    t_near = np.fmax.reduce(np.fmin(t1, t2), axis=1)
+    t_far = np.fmin.reduce(np.fmax(t1, t2), axis=1)
+    return t_far >= np.maximum(t_near, 0.0)
+
+
+def rays_hit_box(origins: np.ndarray, directions: np.ndarray,
+                 box_min: np.ndarray, box_max: np.ndarray) -> np.ndarray:
+    """
+    Test rays against an axis-aligned box.
+
+    Args:
+        origins: Ray origins, shape (R, 3)
+        directions: Ray directions, shape (R, 3)
+        box_min: Minimum box corner, shape (3,)
+        box_max: Maximum box corner, shape (3,)
+
+    Returns:
+        Boolean mask of shape (R,), True where the ray enters the box
+    """
+    with np.errstate(divide='ignore'):
+        inv_dirs = 1.0 / np.asarray(directions, dtype=np.float64)
+    return _ray_box_hit(np.asarray(origins, dtype=np.float64), inv_dirs, box_min, box_max)
+
+
+def _ray_triangle_hit(origins: np.ndarray, directions: np.ndarray,
+                      triangles: np.ndarray, epsilon: float) -> np.ndarray:
+    """
+    Möller–Trumbore any-hit test of K rays against C triangles.
+
+    Returns:
+        Boolean mask of shape (K,), True where the ray hits any triangle
+    """
+    v0 = triangles[None, :, 0, :]
+    edge1 = triangles[None, :, 1, :] - v0
+    edge2 = triangles[None, :, 2, :] - v0
+    d = directions[:, None, :]
+
+    p = np.cross(d, edge2)
+    det = np.einsum('kcj,kcj->kc', edge1, p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_det = 1.0 / det
+        s = origins[:, None, :] - v0
+        u = np.einsum('kcj,kcj->kc', s, p) * inv_det
+        q = np.cross(s, edge1)
+        v = np.einsum('kcj,kcj->kc', d, q) * inv_det
+        t = np.einsum('kcj,kcj->kc', edge2, q) * inv_det
+        hit = (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > epsilon)
+    return hit.any(axis=1)
+
+
+def trace_occlusion(bvh: FlatBVH, origins: np.ndarray, directions: np.ndarray,
+                    epsilon: float = RAY_EPSILON,
+                    triangle_mask: np.ndarray | None = None) -> np.ndarray:
+    """
+    Test which rays are blocked by any triangle in the BVH.
+
+    Rays are traversed as one packet: each visited node filters the packet
+    down to the rays that enter its box and are not yet known to be blocked.
+
+    Args:
+        bvh: Flattened BVH of the obstruction scene
+        origins: Ray origins, shape (R, 3)
+        directions: Ray directions, shape (R, 3); need not be normalised
+        epsilon: Minimum hit distance along the ray
+        triangle_mask: Optional mask over `bvh.triangles` (BVH order); only
+            these triangles block, and subtrees without any are skipped.
+            Lets one BVH serve many subsets of a scene
+
+    Returns:
+        Boolean mask of shape (R,), True where the ray is obstructed
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+    blocked = np.zeros(len(origins), dtype=bool)
+    if bvh.node_count == 0 or len(bvh.triangles) == 0 or len(origins) == 0:
+        return blocked
+
+    live = None
+    if triangle_mask is not None:
+        first, stop = bvh.triangle_ranges
+        counts = np.concatenate([[0], np.cumsum(triangle_mask)])
+        live = counts[stop] > counts[first]
+        if not live[0]:
+            return blocked
+
+    with np.errstate(divide='ignore'):
+        inv_dirs = 1.0 / directions
+
+    stack = [(0, np.arange(len(origins)))]
+    while stack:
+        node, rays = stack.pop()
+        if live is not None and not live[node]:
+            continue
+        rays = rays[~blocked[rays]]
+        if len(rays) == 0:
+            continue
+
+        inside = _ray_box_hit(origins[rays], inv_dirs[rays],
+                              bvh.bounds_min[node], bvh.bounds_max[node])
+        rays = rays[inside]
+        if len(rays) == 0:
+            continue
+
+        if bvh.left[node] < 0:
+            lo = bvh.start[node]
+            tris = bvh.triangles[lo:lo + bvh.count[node]]
+            if triangle_mask is not None:
+                tris = tris[triangle_mask[lo:lo + bvh.count[node]]]
+            hit = _ray_triangle_hit(origins[rays], directions[rays], tris, epsilon)
+            blocked[rays[hit]] = True
+        else:
+            stack.append((bvh.right[node], rays))
+            stack.append((bvh.left[node], rays))
+
+    return blocked
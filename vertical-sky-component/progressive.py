@@ -0,0 +1,343 @@
+"""
+Progressive VSC Evaluation
+
+Coarse-to-fine evaluation for interactive use: a low-resolution VSC estimate
+is returned immediately and refined in the background up to the full
+180×45 grid (or finer), so notebook widgets stay responsive while sliders
+move.
+
+Key concepts:
+- Resolution levels grow by ×3 per axis: (20×5) → (60×15) → (180×45).
+  With the midpoint lattice every coarse sample is also a sample of the
+  next level, so each level only traces the samples the previous level
+  did not and copies the rest of its visibility
+- Each level is traced in chunks of rays; cancellation is checked between
+  chunks, so an obsolete slider value gives up the worker within one chunk
+- `ProgressiveVSC` runs the refinement on a background thread and calls
+  back after every level; starting a new one cancels the old one, and no
+  update is delivered once `cancel()` has returned
+- `ProgressiveEvaluator` and `memoize_figure` remember results per slider
+  value, so scrubbing back and forth is instant
+"""
+
+import contextlib
+import functools
+import io
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from batch import CIE_SKY_MULTIPLIER, ORIGIN_OFFSET, _normalize, hemisphere_directions, sky_weights
+from main import HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION
+from obstruction import Scene, trace_occlusion
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# (horizontal, vertical) resolution per level, ending at the production grid
+LEVELS = (
+    (HORIZONTAL_ANGLE_RESOLUTION // 9, VERTICAL_ANGLE_RESOLUTION // 9),
+    (HORIZONTAL_ANGLE_RESOLUTION // 3, VERTICAL_ANGLE_RESOLUTION // 3),
+    (HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION),
+)
+MAX_CACHED_RESULTS = 256
+RAY_CHUNK_SIZE = 4096      # Rays traced between cancellation checks
+
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vsc-progressive')
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Progressive Evaluation
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class Estimate:
+    """
+    VSC estimate at one resolution level.
+
+    Attributes:
+        values: VSC values (percentage), shape (N,)
+        horizontal_resolution: Azimuth samples used
+        vertical_resolution: Elevation samples used
+        level: Index into the level ladder
+        final: True for the finest level
+    """
+    values: np.ndarray
+    horizontal_resolution: int
+    vertical_resolution: int
+    level: int
+    final: bool
+
+    @property
+    def sample_count(self) -> int:
+        return self.horizontal_resolution * self.vertical_resolution
+
+
+def nested_samples(coarse: tuple[int, int], fine: tuple[int, int]) -> np.ndarray | None:
+    """
+    Where the samples of a coarse `hemisphere_directions` lattice sit in a finer one.
+
+    The lattices nest when both axes are refined by the same odd integer
+    ratio r: coarse sample (a, t) is fine sample (r·a, r·t + (r − 1) / 2).
+
+    Returns:
+        Flat fine-lattice index of every coarse sample, shape (Dc,), or None
+        if the lattices do not nest
+    """
+    (h_coarse, v_coarse), (h_fine, v_fine) = coarse, fine
+    ratio = h_fine // h_coarse
+    if ratio < 1 or ratio % 2 == 0 or h_fine != ratio * h_coarse or v_fine != ratio * v_coarse:
+        return None
+    azimuth, elevation = np.divmod(np.arange(h_coarse * v_coarse), v_coarse)
+    return (ratio * azimuth) * v_fine + ratio * elevation + (ratio - 1) // 2
+
+
+def iter_progressive_vsc(
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    levels: tuple[tuple[int, int], ...] = LEVELS,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+    origin_offset: float = ORIGIN_OFFSET,
+    chunk_size: int = RAY_CHUNK_SIZE,
+    stop: Callable[[], bool] | None = None,
+) -> Iterator[Estimate]:
+    """
+    Yield VSC estimates from the coarsest to the finest resolution.
+
+    Every level equals `compute_vsc_batch` at its resolution. When a level
+    nests in the previous one (see `nested_samples`), the shared samples
+    are not traced again.
+
+    Args:
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3)
+        scene: Obstruction scene, or None for an unobstructed sky
+        levels: (horizontal, vertical) resolution per level, coarse to fine
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ)
+        origin_offset: Distance to lift ray origins off the surface
+        chunk_size: Rays traced between calls to `stop`
+        stop: Polled between chunks; the iteration ends without yielding
+            the level in progress once it returns True
+
+    Yields:
+        One `Estimate` per level
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = _normalize(normals)
+    previous: tuple[tuple[int, int], np.ndarray] | None = None
+
+    for i, (h_res, v_res) in enumerate(levels):
+        directions, solid_angles = hemisphere_directions(h_res, v_res)
+        weights = sky_weights(normals, directions, solid_angles, sky_multiplier)
+        visible = weights > 0
+        reused = nested_samples(previous[0], (h_res, v_res)) if previous is not None else None
+
+        if scene is not None and scene.triangle_count:
+            todo = visible.copy()
+            if reused is not None:
+                todo[:, reused] = False
+            point_idx, dir_idx = np.nonzero(todo)
+            for lo in range(0, len(point_idx), chunk_size):
+                if stop is not None and stop():
+                    return
+                p, d = point_idx[lo:lo + chunk_size], dir_idx[lo:lo + chunk_size]
+                blocked = trace_occlusion(scene.bvh, points[p] + origin_offset * normals[p],
+                                          directions[d])
+                visible[p[blocked], d[blocked]] = False
+            if reused is not None:
+                visible[:, reused] = previous[1]
+
+        if stop is not None and stop():
+            return
+        final = i == len(levels) - 1
+        yield Estimate(np.sum(weights * visible, axis=1), h_res, v_res, i, final)
+        previous = None if final else ((h_res, v_res), visible)
+
+
+class ProgressiveVSC:
+    """
+    Compute the coarsest level now and refine the rest in the background.
+
+    Args:
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3)
+        scene: Obstruction scene, or None for an unobstructed sky
+        levels: (horizontal, vertical) resolution per level, coarse to fine
+        on_update: Called with each new `Estimate`, including the first one.
+            Refined estimates are delivered from the background thread.
+        executor: Where to run the refinement (default: one shared thread,
+            so only one refinement runs at a time)
+        **options: Forwarded to `iter_progressive_vsc` (sky model, ray
+            offset, chunk size)
+    """
+
+    def __init__(
+        self,
+        points: np.ndarray,
+        normals: np.ndarray,
+        scene: Scene | None = None,
+        levels: tuple[tuple[int, int], ...] = LEVELS,
+        on_update: Callable[[Estimate], None] | None = None,
+        executor: Executor | None = None,
+        **options,
+    ):
+        self._on_update = on_update
+        self._cancelled = threading.Event()
+        self._lock = threading.RLock()  # Re-entrant: `on_update` may cancel
+        # Exists before the first update, so `on_update` can already cancel
+        self._future: Future = Future()
+        self._estimates = iter_progressive_vsc(points, normals, scene, levels,
+                                               stop=self._cancelled.is_set, **options)
+        self.latest: Estimate = next(self._estimates)
+        if not self._publish(self.latest) or self._cancelled.is_set():
+            return
+        if self.latest.final:
+            self._future.set_result(self.latest)
+            return
+        self._future = (executor or _background).submit(self._refine)
+        if self._cancelled.is_set():  # Cancelled from another thread meanwhile
+            self._future.cancel()
+
+    def _publish(self, estimate: Estimate) -> bool:
+        """Record and report an estimate unless cancelled; checked under the lock."""
+        with self._lock:
+            if self._cancelled.is_set():
+                return False
+            self.latest = estimate
+            if self._on_update is not None:
+                self._on_update(estimate)
+            return True
+
+    def _refine(self) -> Estimate:
+        for estimate in self._estimates:
+            if not self._publish(estimate):
+                break
+        return self.latest
+
+    def cancel(self) -> None:
+        """
+        Stop refining within one ray chunk.
+
+        Waits for an update that is being delivered; none follows afterwards.
+        """
+        with self._lock:
+            self._cancelled.set()
+        self._future.cancel()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def result(self, timeout: float | None = None) -> Estimate:
+        """Block until refinement finishes (or is cancelled) and return the best estimate."""
+        if not self._future.cancelled():
+            self._future.result(timeout)
+        return self.latest
+
+
+class ProgressiveEvaluator:
+    """
+    Progressive VSC for widgets: one live evaluation, memoised per key.
+
+    Each call to `evaluate` cancels the previous refinement. Finished
+    results are kept (LRU) under the caller's key, typically the slider
+    values, so returning to a setting reports the final result at once.
+
+    Args:
+        levels: (horizontal, vertical) resolution per level, coarse to fine
+        max_cached: Number of final results to remember
+    """
+
+    def __init__(self, levels: tuple[tuple[int, int], ...] = LEVELS,
+                 max_cached: int = MAX_CACHED_RESULTS):
+        self.levels = levels
+        self.max_cached = max_cached
+        self._finished: OrderedDict[Hashable, Estimate] = OrderedDict()
+        self._current: ProgressiveVSC | None = None
+        self._lock = threading.Lock()
+
+    def evaluate(
+        self,
+        key: Hashable,
+        points: np.ndarray,
+        normals: np.ndarray,
+        scene: Scene | None = None,
+        on_update: Callable[[Estimate], None] | None = None,
+        **options,
+    ) -> Estimate:
+        """
+        Start (or recall) the evaluation for `key`.
+
+        Returns:
+            The best estimate available right now: the memoised final result,
+            or the coarsest level of a fresh evaluation
+        """
+        if self._current is not None:
+            self._current.cancel()
+
+        with self._lock:
+            if key in self._finished:
+                self._finished.move_to_end(key)
+                estimate = self._finished[key]
+                if on_update is not None:
+                    on_update(estimate)
+                return estimate
+
+        def remember(estimate: Estimate) -> None:
+            if estimate.final:
+                with self._lock:
+                    self._finished[key] = estimate
+                    while len(self._finished) > self.max_cached:
+                        self._finished.popitem(last=False)
+            if on_update is not None:
+                on_update(estimate)
+
+        self._current = ProgressiveVSC(points, normals, scene, self.levels,
+                                       on_update=remember, **options)
+        return self._current.latest
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Widget Helpers
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def memoize_figure(func: Callable, max_cached: int = MAX_CACHED_RESULTS) -> Callable:
+    """
+    Memoise a plotting function for use with `ipywidgets.interact`.
+
+    `func` must return a matplotlib Figure instead of calling `plt.show()`.
+    The figure is rendered to PNG once per argument combination and, together
+    with anything `func` printed, replayed from memory on later calls.
+    """
+    from IPython.display import Image, display
+    import matplotlib.pyplot as plt
+
+    cache: OrderedDict[tuple, tuple[bytes, str]] = OrderedDict()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        if key in cache:
+            cache.move_to_end(key)
+        else:
+            text = io.StringIO()
+            with contextlib.redirect_stdout(text):
+                fig = func(*args, **kwargs)
+            png = io.BytesIO()
+            fig.savefig(png, format='png', bbox_inches='tight')
+            plt.close(fig)
+            cache[key] = (png.getvalue(), text.getvalue())
+            while len(cache) > max_cached:
+                cache.popitem(last=False)
+
+        png, text = cache[key]
+        display(Image(png))
+        print(text, end='')
+
+    return wrapper
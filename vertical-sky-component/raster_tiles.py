@@ -0,0 +1,308 @@
+"""
+VSC Raster Tiles
+
+Turns per-point VSC results on a facade or ground grid into colour-mapped
+image tiles at several zoom levels, for serving as textures from an API
+(`info-vsc.md`) instead of plotting points with matplotlib `scatter`.
+
+Key concepts:
+- Each point stands for one cell of its sampling grid (`spacing` wide) and
+  is splatted over the finest-level pixels whose centres fall in that cell,
+  so a grid renders as a continuous surface rather than isolated dots
+- Splatting uses `np.bincount` (sum of values and count per pixel); each
+  coarser zoom level is a 2×2 sum-pooling of the one below, so every level
+  is a pixel-exact average
+- `max_zoom` is capped at the deepest level where a cell spans at most
+  `MAX_CELL_PIXELS` pixels: finer levels would only enlarge the same cells.
+  Sums are float32 and counts int32, which keeps a 2048-pixel level at 32 MB
+- Colours come from a 256-entry RGBA lookup table built once per colormap;
+  colouring a tile is one clip, one cast and one fancy-indexing step
+- Pixels without samples are transparent
+- Tiles follow the z/x/y convention: zoom z has 2^z × 2^z tiles, with tile
+  (0, 0) at the top left; PNGs are encoded with zlib, no imaging library
+"""
+
+import functools
+import os
+import struct
+import zlib
+
+import numpy as np
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+TILE_SIZE = 256        # Pixels per tile edge
+LUT_SIZE = 256         # Colormap entries
+DEFAULT_COLORMAP = 'RdYlGn'
+DEFAULT_RANGE = (0.0, 40.0)   # VSC (%) mapped to the ends of the colormap
+MAX_CELL_PIXELS = 4           # Finest-level pixels per grid cell before zoom is capped
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Colormaps and Coordinates
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@functools.lru_cache(maxsize=16)
+def colormap_lut(name: str = DEFAULT_COLORMAP, size: int = LUT_SIZE) -> np.ndarray:
+    """
+    RGBA lookup table of a matplotlib colormap, built once per name.
+
+    Returns:
+        Read-only uint8 array of shape (size, 4)
+    """
+    import matplotlib
+
+    lut = (matplotlib.colormaps[name](np.linspace(0, 1, size)) * 255 + 0.5).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def surface_coordinates(points: np.ndarray, normal: np.ndarray) -> np.ndarray:
+    """
+    Project points onto the plane of a facade or the ground.
+
+    For a facade the axes are (along the wall, up); for a horizontal surface
+    they are (x, y).
+
+    Args:
+        points: Points on the surface, shape (N, 3)
+        normal: Surface normal, shape (3,)
+
+    Returns:
+        In-plane coordinates, shape (N, 2)
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normal = np.asarray(normal, dtype=np.float64)
+    normal = normal / np.linalg.norm(normal)
+    up = np.array([0.0, 0.0, 1.0])
+    along = np.cross(up, normal)
+    if np.linalg.norm(along) < 1e-9:
+        return points[:, :2].copy()
+    along /= np.linalg.norm(along)
+    return np.stack([points @ along, points @ np.cross(normal, along)], axis=1)
+
+
+def grid_spacing(coordinates: np.ndarray) -> float | None:
+    """
+    Estimate the sample spacing of points laid out on a regular grid.
+
+    Returns:
+        Spacing s of a rectangular grid with that extent and point count,
+        from N = (width / s + 1)(height / s + 1) (along the line for
+        collinear points), or None for fewer than two distinct points
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    if len(coordinates) < 2:
+        return None
+    extent = np.ptp(coordinates, axis=0)
+    if extent.max() <= 0:
+        return None
+    if extent.min() <= 1e-9 * extent.max():
+        return float(extent.max() / (len(coordinates) - 1))
+    # N·s² = (width + s)(height + s), i.e. (N − 1)s² − (width + height)s − width·height = 0
+    width, height, n = extent[0], extent[1], len(coordinates) - 1
+    return float((width + height + np.sqrt((width + height)**2 + 4 * n * width * height)) / (2 * n))
+
+
+def _cell_pixels(position: np.ndarray, half_width: float, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pixel range [first, stop) whose centres lie within `half_width` of each position.
+
+    Positions are in pixel units. A cell narrower than one pixel still
+    covers the pixel it falls in.
+    """
+    first = np.ceil(position - half_width - 0.5).astype(np.int64)
+    stop = np.ceil(position + half_width - 0.5).astype(np.int64)
+    narrow = stop <= first
+    first[narrow] = np.floor(position[narrow]).astype(np.int64)
+    stop[narrow] = first[narrow] + 1
+    return np.clip(first, 0, size), np.clip(stop, 0, size)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Tile Pyramid
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TilePyramid:
+    """
+    Per-zoom pixel averages of VSC values, ready to be cut into tiles.
+
+    Args:
+        coordinates: In-plane point coordinates, shape (N, 2)
+        values: VSC values (percentage), shape (N,); NaNs are ignored. With
+            no finite values every tile is transparent
+        max_zoom: Finest zoom level; its grid is TILE_SIZE · 2^max_zoom pixels.
+            Lowered to the deepest level where one grid cell spans at most
+            `MAX_CELL_PIXELS` pixels; the level used is `self.max_zoom`
+        tile_size: Pixels per tile edge
+        bounds: (min_u, min_v, max_u, max_v) covered by the pyramid; defaults
+            to a square around the points
+        spacing: Distance between neighbouring grid points in scene units;
+            estimated with `grid_spacing` by default. Pass 0 to draw each
+            point as a single pixel
+        value_range: VSC values mapped to the first and last colour
+        colormap: Matplotlib colormap name used for the lookup table
+    """
+
+    def __init__(
+        self,
+        coordinates: np.ndarray,
+        values: np.ndarray,
+        max_zoom: int = 3,
+        tile_size: int = TILE_SIZE,
+        bounds: tuple[float, float, float, float] | None = None,
+        value_range: tuple[float, float] = DEFAULT_RANGE,
+        colormap: str = DEFAULT_COLORMAP,
+        spacing: float | None = None,
+    ):
+        coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        keep = np.isfinite(values) & np.isfinite(coordinates).all(axis=1)
+        coordinates, values = coordinates[keep], values[keep]
+        if spacing is None:
+            spacing = grid_spacing(coordinates) or 0.0
+
+        if bounds is None and not len(coordinates):
+            bounds = (0.0, 0.0, 1.0, 1.0)  # Nothing to draw: an all-transparent pyramid
+        elif bounds is None:
+            lo, hi = coordinates.min(axis=0), coordinates.max(axis=0)
+            half = max((hi - lo).max() / 2 + spacing / 2, 1e-9) * (1 + 1e-9)  # Keep edge cells inside
+            center = (lo + hi) / 2
+            bounds = (*(center - half), *(center + half))
+        self.bounds = tuple(float(b) for b in bounds)
+        min_u, min_v, max_u, max_v = self.bounds
+        extent = max(max_u - min_u, max_v - min_v)
+        if spacing > 0:
+            finest = np.log2(extent * MAX_CELL_PIXELS / (spacing * tile_size))
+            max_zoom = min(max_zoom, max(int(np.floor(finest)), 0))
+        self.max_zoom = max_zoom
+        self.tile_size = tile_size
+        self.spacing = spacing
+        self.value_range = value_range
+        self.lut = colormap_lut(colormap)
+
+        # Finest grid: row 0 at the top (largest v), as in images
+        size = tile_size << max_zoom
+        col_first, col_stop = _cell_pixels((coordinates[:, 0] - min_u) / (max_u - min_u) * size,
+                                           spacing / 2 / (max_u - min_u) * size, size)
+        row_first, row_stop = _cell_pixels((max_v - coordinates[:, 1]) / (max_v - min_v) * size,
+                                           spacing / 2 / (max_v - min_v) * size, size)
+        widths, heights = col_stop - col_first, row_stop - row_first
+        pixels, pixel_values = [], []
+        for dy in range(int(heights.max(initial=0))):
+            for dx in range(int(widths.max(initial=0))):
+                covers = (dx < widths) & (dy < heights)
+                pixels.append((row_first[covers] + dy) * size + col_first[covers] + dx)
+                pixel_values.append(values[covers])
+        # Accumulate over the touched pixels only, then scatter into the
+        # float32/int32 level, so no full-size float64 array is ever built
+        touched, pixel = np.unique(np.concatenate(pixels or [np.empty(0, np.int64)]),
+                                   return_inverse=True)
+        sums = np.zeros(size * size, dtype=np.float32)
+        counts = np.zeros(size * size, dtype=np.int32)
+        sums[touched] = np.bincount(pixel, np.concatenate(pixel_values or [np.empty(0)]),
+                                    minlength=len(touched))
+        counts[touched] = np.bincount(pixel, minlength=len(touched))
+
+        self._sums = [sums.reshape(size, size)]
+        self._counts = [counts.reshape(size, size)]
+        for _ in range(max_zoom):
+            n = self._sums[0].shape[0] // 2
+            self._sums.insert(0, self._sums[0].reshape(n, 2, n, 2).sum(axis=(1, 3), dtype=np.float32))
+            self._counts.insert(0, self._counts[0].reshape(n, 2, n, 2).sum(axis=(1, 3), dtype=np.int32))
+
+    def mean(self, zoom: int) -> np.ndarray:
+        """Average VSC per pixel at `zoom` (NaN where no points fall)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._sums[zoom] / self._counts[zoom]
+
+    def colorize(self, sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Map summed values and counts to RGBA through the lookup table."""
+        low, high = self.value_range
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scaled = (sums / counts - low) * ((len(self.lut) - 1) / (high - low))
+        index = np.clip(np.nan_to_num(scaled), 0, len(self.lut) - 1).astype(np.uint8)
+        rgba = self.lut[index]
+        rgba[counts == 0, 3] = 0
+        return rgba
+
+    def tile(self, zoom: int, x: int, y: int) -> np.ndarray:
+        """
+        Cut one tile.
+
+        Args:
+            zoom: Zoom level, 0 to `max_zoom`
+            x: Tile column, 0 to 2^zoom - 1 (left to right)
+            y: Tile row, 0 to 2^zoom - 1 (top to bottom)
+
+        Returns:
+            RGBA image, uint8 array of shape (tile_size, tile_size, 4)
+        """
+        if not 0 <= zoom <= self.max_zoom or not (0 <= x < 1 << zoom and 0 <= y < 1 << zoom):
+            raise IndexError(f"no tile {zoom}/{x}/{y} (max zoom {self.max_zoom})")
+        rows = slice(y * self.tile_size, (y + 1) * self.tile_size)
+        cols = slice(x * self.tile_size, (x + 1) * self.tile_size)
+        return self.colorize(self._sums[zoom][rows, cols], self._counts[zoom][rows, cols])
+
+    def tile_png(self, zoom: int, x: int, y: int) -> bytes:
+        """One tile as PNG bytes, e.g. for an HTTP response."""
+        return encode_png(self.tile(zoom, x, y))
+
+    def export(self, directory: str | os.PathLike, skip_empty: bool = True) -> int:
+        """
+        Write every tile as `<directory>/<zoom>/<x>/<y>.png`.
+
+        Args:
+            directory: Output root
+            skip_empty: Do not write tiles without any points
+
+        Returns:
+            Number of tiles written
+        """
+        written = 0
+        for zoom in range(self.max_zoom + 1):
+            for x in range(1 << zoom):
+                for y in range(1 << zoom):
+                    rows = slice(y * self.tile_size, (y + 1) * self.tile_size)
+                    cols = slice(x * self.tile_size, (x + 1) * self.tile_size)
+                    if skip_empty and not self._counts[zoom][rows, cols].any():
+                        continue
+                    path = os.path.join(directory, str(zoom), str(x), f'{y}.png')
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'wb') as f:
+                        f.write(self.tile_png(zoom, x, y))
+                    written += 1
+        return written
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PNG Encoding
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def encode_png(rgba: np.ndarray, compression: int = 6) -> bytes:
+    """
+    Encode an RGBA image as PNG.
+
+    Args:
+        rgba: uint8 array of shape (H, W, 4)
+        compression: zlib level (1 = fastest)
+
+    Returns:
+        PNG file contents
+    """
+    height, width, _ = rgba.shape
+    # Each scanline starts with filter type 0 (none)
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = np.ascontiguousarray(rgba, dtype=np.uint8).reshape(height, -1)
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(raw.tobytes(), compression))
+            + _png_chunk(b'IEND', b''))
@@ -0,0 +1,240 @@
+"""
+Parallel Figure Rendering
+
+Renders the static figures of `main.py` and `static-plots/angles_visualization.py`
+in worker processes with the non-interactive Agg backend, one figure per
+task, so regenerating the full set takes about as long as the slowest figure.
+
+With `skip_unchanged`, a manifest in the output directory records a
+fingerprint per figure: the source of its module, library versions, the DPI
+and the module's `figure_inputs()` (resolution, sky model, ...). Figures whose
+fingerprint and file are unchanged since the last run are not re-rendered.
+
+Usage:
+    python render.py                      # all figures into static-plots/
+    python render.py --workers 4 --output-dir build/figures --skip-unchanged
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Figure Registry
+# ═══════════════════════════════════════════════════════════════════════════════
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATIC_PLOTS_DIR = os.path.join(HERE, 'static-plots')
+DPI = 150
+MANIFEST_NAME = '.render-manifest.json'
+
+# Output file name → (module, plotting function)
+VSC_FIGURES = {
+    '01_cie_luminance_distribution.png': ('main', 'plot_cie_luminance_distribution'),
+    '02_hemisphere_sampling.png': ('main', 'plot_hemisphere_sampling'),
+    '03_vsc_contribution_map.png': ('main', 'plot_vsc_contribution_map'),
+    '04_vsc_vs_tilt.png': ('main', 'plot_vsc_vs_tilt'),
+    '05_theoretical_bounds_summary.png': ('main', 'plot_theoretical_bounds_summary'),
+}
+ANGLE_FIGURES = {
+    'angles_01_elevation_rings.png': ('angles_visualization', 'plot_elevation_rings'),
+    'angles_02_azimuth_lines.png': ('angles_visualization', 'plot_azimuth_lines'),
+    'angles_03_combined_grid.png': ('angles_visualization', 'plot_combined_grid'),
+    'angles_04_labeled_dome.png': ('angles_visualization', 'plot_angle_values_on_dome'),
+}
+FIGURES = {**VSC_FIGURES, **ANGLE_FIGURES}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Workers
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _add_module_paths() -> None:
+    for path in (HERE, STATIC_PLOTS_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _init_worker() -> None:
+    """Select Agg in a pool process before any plotting module touches pyplot."""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    _add_module_paths()
+
+
+def render_figure(module: str, function: str, path: str, dpi: int = DPI) -> tuple[str, float]:
+    """
+    Build one figure and save it.
+
+    Leaves the process's pyplot backend and interactive mode as they were:
+    the figure is closed in pyplot as soon as it is built and saved through
+    its own Agg canvas, so it is never shown.
+
+    Args:
+        module: Module defining the plotting function
+        function: Name of a function returning a matplotlib Figure
+        path: Output file
+        dpi: Output resolution
+
+    Returns:
+        Tuple of (path, seconds spent)
+    """
+    _add_module_paths()
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    start = time.perf_counter()
+    with plt.ioff():
+        fig = getattr(importlib.import_module(module), function)()
+    plt.close(fig)
+    FigureCanvasAgg(fig)  # Attaches itself to the figure
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path, time.perf_counter() - start
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Skip-if-unchanged
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def figure_fingerprint(module: str, function: str, dpi: int = DPI) -> str:
+    """
+    Hash everything a figure depends on.
+
+    Covers the plotting module's source file, the numpy and matplotlib
+    versions, the DPI, and the module's `figure_inputs()` if it defines one.
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    _add_module_paths()
+    import matplotlib
+    import numpy
+
+    mod = importlib.import_module(module)
+    with open(mod.__file__, 'rb') as f:
+        source = hashlib.sha256(f.read()).hexdigest()
+    inputs = mod.figure_inputs() if hasattr(mod, 'figure_inputs') else {}
+
+    payload = json.dumps({
+        'module': module, 'function': function, 'source': source, 'dpi': dpi,
+        'numpy': numpy.__version__, 'matplotlib': matplotlib.__version__,
+        'inputs': inputs,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _load_manifest(output_dir: str) -> dict[str, str]:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(output_dir: str, manifest: dict[str, str]) -> None:
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f'{path}.tmp', path)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Rendering
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def render_figures(
+    figures: dict[str, tuple[str, str]] = FIGURES,
+    output_dir: str = STATIC_PLOTS_DIR,
+    workers: int | None = None,
+    dpi: int = DPI,
+    skip_unchanged: bool = False,
+) -> dict[str, float]:
+    """
+    Render figures concurrently in a process pool.
+
+    Args:
+        figures: Output file name → (module, plotting function)
+        output_dir: Directory to write the images to (created if missing)
+        workers: Number of processes; defaults to one per figure, capped at
+            the CPU count. Use 1 to render serially in this process.
+        dpi: Output resolution
+        skip_unchanged: Skip figures whose file exists and whose fingerprint
+            matches the manifest from the previous run
+
+    Returns:
+        Output path → seconds spent rendering it (skipped figures excluded)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+    fingerprints = {name: figure_fingerprint(module, function, dpi)
+                    for name, (module, function) in figures.items()}
+
+    tasks = {}
+    for name, spec in figures.items():
+        path = os.path.join(output_dir, name)
+        if skip_unchanged and manifest.get(name) == fingerprints[name] and os.path.exists(path):
+            print(f"   ↷ Unchanged: {os.path.relpath(path)}")
+            continue
+        tasks[path] = spec
+    if not tasks:
+        return {}
+
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    try:
+        if workers <= 1:
+            results = (render_figure(module, function, path, dpi)
+                       for path, (module, function) in tasks.items())
+            return _report(results, manifest, fingerprints)
+
+        # The initializer also runs in spawned processes, before any task
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(render_figure, module, function, path, dpi)
+                       for path, (module, function) in tasks.items()]
+            return _report((future.result() for future in as_completed(futures)),
+                           manifest, fingerprints)
+    finally:
+        _save_manifest(output_dir, manifest)
+
+
+def _report(results, manifest: dict[str, str], fingerprints: dict[str, str]) -> dict[str, float]:
+    """Print and record each finished figure; the manifest only lists completed files."""
+    timings = {}
+    for path, seconds in results:
+        timings[path] = seconds
+        manifest[os.path.basename(path)] = fingerprints[os.path.basename(path)]
+        print(f"   ✓ Saved: {os.path.relpath(path)} ({seconds:.1f}s)")
+    return timings
+
+
+def main():
+    """Render all static figures in parallel."""
+    parser = argparse.ArgumentParser(description="Render the static VSC and angle figures")
+    parser.add_argument('--output-dir', default=STATIC_PLOTS_DIR,
+                        help="directory to write the PNG files to")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (1 = serial)")
+    parser.add_argument('--only', choices=['vsc', 'angles'],
+                        help="render only one of the two figure sets")
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help="only re-render figures whose inputs changed since the last run")
+    args = parser.parse_args()
+
+    figures = {'vsc': VSC_FIGURES, 'angles': ANGLE_FIGURES}.get(args.only, FIGURES)
+
+    print("📈 Rendering figures...")
+    start = time.perf_counter()
+    rendered = render_figures(figures, args.output_dir, args.workers, args.dpi,
+                              args.skip_unchanged)
+    print(f"\n✅ {len(rendered)} of {len(figures)} figures rendered "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Compact Result Storage
+
+Writes VSC results straight into caller-provided buffers in the 0-1 scale
+used downstream (the H5 pipeline in `info-vsc.md` divides the 0-100 scores
+by 100), optionally as 16-bit fixed point, and stores them chunk-compressed.
+
+Key concepts:
+- `compute_vsc_into` fills an existing array chunk by chunk: a `np.memmap`,
+  a view of `multiprocessing.shared_memory`, or any writable ndarray. No
+  full-size intermediate array is allocated
+- Float buffers receive the fraction VSC / 100. uint16 buffers receive
+  round(fraction · 65534); the quantization step is 1/65534 ≈ 1.5e-5
+  (0.0015 VSC percentage points), so decoding is off by at most half a step.
+  Code 65535 marks a missing value (NaN)
+- Storage files hold independently zlib-compressed chunks after a byte
+  shuffle (high and low bytes grouped), so any chunk can be read alone
+- With h5py installed, `write_h5` hands the same encoding to an HDF5
+  dataset with gzip + shuffle filters; h5py is optional
+"""
+
+import json
+import os
+import struct
+import zlib
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch import DEFAULT_CHUNK_SIZE, iter_vsc_chunks
+from obstruction import Scene
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+FIXED_POINT_SCALE = 65534          # uint16 code of a VSC fraction of 1.0
+FIXED_POINT_MISSING = 65535        # uint16 code of a missing value
+QUANTIZATION_STEP = 1.0 / FIXED_POINT_SCALE
+STORE_MAGIC = b'VSCRES01'
+STORE_SUFFIX = '.vscres'
+STORE_CHUNK = 65536                # Values per compressed chunk
+COMPRESSION_LEVEL = 6
+
+RESULT_DTYPES = (np.dtype(np.float64), np.dtype(np.float32), np.dtype(np.uint16))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Encoding
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def encode_fraction(vsc: np.ndarray, dtype: np.dtype | type = np.float32) -> np.ndarray:
+    """
+    Convert VSC percentages to the stored 0-1 representation.
+
+    Args:
+        vsc: VSC values (percentage)
+        dtype: float32, float64, or uint16 for fixed point
+
+    Returns:
+        Encoded values of `dtype`
+    """
+    dtype = np.dtype(dtype)
+    fraction = np.asarray(vsc, dtype=np.float64) / 100
+    if dtype == np.uint16:
+        codes = np.rint(np.clip(fraction, 0.0, 1.0) * FIXED_POINT_SCALE)
+        return np.where(np.isnan(fraction), FIXED_POINT_MISSING, codes).astype(np.uint16)
+    if dtype not in RESULT_DTYPES:
+        raise TypeError(f"unsupported result dtype {dtype}; expected one of {RESULT_DTYPES}")
+    return fraction.astype(dtype)
+
+
+def decode_fraction(values: np.ndarray) -> np.ndarray:
+    """
+    Convert stored values back to VSC fractions (0-1, float64).
+
+    uint16 codes are scaled by `QUANTIZATION_STEP`; missing codes become NaN.
+    """
+    values = np.asarray(values)
+    if values.dtype == np.uint16:
+        fraction = values * QUANTIZATION_STEP
+        fraction[values == FIXED_POINT_MISSING] = np.nan
+        return fraction
+    return values.astype(np.float64)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Caller-provided Buffers
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def compute_vsc_into(
+    out: np.ndarray,
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **options,
+) -> np.ndarray:
+    """
+    Compute the VSC and write it, encoded, into `out`.
+
+    Args:
+        out: Writable buffer of shape (N,) with a dtype from `RESULT_DTYPES`
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3)
+        scene: Obstruction scene, or None for an unobstructed sky
+        chunk_size: Points computed (and written) per step
+        **options: Forwarded to `compute_vsc_batch`
+
+    Returns:
+        `out`
+    """
+    if out.dtype not in RESULT_DTYPES:
+        raise TypeError(f"unsupported result dtype {out.dtype}; expected one of {RESULT_DTYPES}")
+    if out.shape != (len(points),):
+        raise ValueError(f"out must have shape ({len(points)},), got {out.shape}")
+    for start, stop, values in iter_vsc_chunks(points, normals, scene, chunk_size, **options):
+        out[start:stop] = encode_fraction(values, out.dtype)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+def memmap_result_buffer(path: str | os.PathLike, count: int,
+                         dtype: np.dtype | type = np.uint16) -> np.memmap:
+    """Create a file-backed result buffer of `count` values."""
+    return np.memmap(path, dtype=dtype, mode='w+', shape=(count,))
+
+
+def shared_result_buffer(count: int, dtype: np.dtype | type = np.uint16,
+                         name: str | None = None) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    """
+    Create a result buffer in shared memory.
+
+    Other processes attach with `shared_memory.SharedMemory(name=shm.name)`.
+    The caller owns the block: `close()` it everywhere and `unlink()` it once.
+
+    Returns:
+        Tuple of (shared memory block, ndarray view of it)
+    """
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(count * dtype.itemsize, 1))
+    return shm, np.ndarray((count,), dtype=dtype, buffer=shm.buf)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Chunk-compressed Storage
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _shuffle(values: np.ndarray) -> bytes:
+    """Group the i-th byte of every value together; fractions compress far better."""
+    return np.ascontiguousarray(values).view(np.uint8).reshape(-1, values.dtype.itemsize).T.tobytes()
+
+
+def _unshuffle(data: bytes, dtype: np.dtype) -> np.ndarray:
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(planes.T).view(dtype).reshape(-1)
+
+
+def save_results(path: str | os.PathLike, values: np.ndarray, chunk: int = STORE_CHUNK) -> None:
+    """
+    Write encoded results as independently compressed chunks.
+
+    File layout: magic, uint64 header length, JSON header (dtype, count,
+    chunk length, byte offset of every chunk), then the chunks.
+
+    Args:
+        path: Destination file
+        values: Encoded results from `encode_fraction` or `compute_vsc_into`
+        chunk: Values per chunk
+    """
+    values = np.asarray(values)
+    dtype = values.dtype.newbyteorder('<')
+    values = values.astype(dtype, copy=False)
+    blobs = [zlib.compress(_shuffle(values[lo:lo + chunk]), COMPRESSION_LEVEL)
+             for lo in range(0, len(values), chunk)]
+    offsets = np.cumsum([0] + [len(blob) for blob in blobs]).tolist()
+    header = json.dumps({'dtype': dtype.str, 'count': len(values), 'chunk': chunk,
+                         'quantization_step': QUANTIZATION_STEP if dtype == np.uint16 else None,
+                         'offsets': offsets}).encode()
+
+    tmp_path = f'{os.fspath(path)}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(STORE_MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def load_results(path: str | os.PathLike, start: int = 0, stop: int | None = None) -> np.ndarray:
+    """
+    Read encoded results, decompressing only the chunks covering [start, stop).
+
+    Returns:
+        Encoded values; pass them to `decode_fraction` for 0-1 floats
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+            raise ValueError(f"{path} is not a VSC result file")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length))
+        data_start = f.tell()
+
+        dtype, chunk, offsets = np.dtype(header['dtype']), header['chunk'], header['offsets']
+        stop = header['count'] if stop is None else min(stop, header['count'])
+        if start >= stop:
+            return np.empty(0, dtype=dtype)
+        first, last = start // chunk, (stop - 1) // chunk
+        f.seek(data_start + offsets[first])
+        raw = f.read(offsets[last + 1] - offsets[first])
+
+    parts = [_unshuffle(zlib.decompress(raw[offsets[i] - offsets[first]:offsets[i + 1] - offsets[first]]),
+                        dtype)
+             for i in range(first, last + 1)]
+    return np.concatenate(parts)[start - first * chunk:stop - first * chunk]
+
+
+def write_h5(path: str | os.PathLike, dataset: str, values: np.ndarray,
+             chunk: int = STORE_CHUNK) -> None:
+    """
+    Store encoded results in an HDF5 dataset (requires h5py).
+
+    The dataset is chunked and gzip + shuffle compressed; uint16 datasets
+    carry `quantization_step` and `missing_code` attributes for decoding.
+    """
+    try:
+        import h5py
+    except ImportError as error:
+        raise ImportError("write_h5 needs h5py; install it or use save_results") from error
+
+    values = np.asarray(values)
+    with h5py.File(path, 'a') as f:
+        if dataset in f:
+            del f[dataset]
+        data = f.create_dataset(dataset, data=values, chunks=(min(chunk, max(len(values), 1)),),
+                                compression='gzip', shuffle=True)
+        data.attrs['scale'] = 'fraction'
+        if values.dtype == np.uint16:
+            data.attrs['quantization_step'] = QUANTIZATION_STEP
+            data.attrs['missing_code'] = FIXED_POINT_MISSING
@@ -0,0 +1,238 @@
+"""
+Stochastic and Quasi-Monte Carlo Hemisphere Sampling
+
+Alternatives to the regular 180×45 lattice of `compute_ray_directions`. A
+regular lattice lines up with regular building edges and aliases; randomised
+and low-discrepancy point sets do not, and reach the same accuracy with far
+fewer rays.
+
+Key concepts:
+- Every sampler estimates the same integral as the lattice:
+  VSC = 100 / I · ∫ max(n·ω, 0) · (1 + k·sin θ) · V(ω) dω,  I = 2π(1/2 + k/3)
+- Points in the unit square come from a sequence ('random', 'stratified'
+  jittered, 'halton' or 'sobol') and are mapped onto the sky either
+  uniformly by solid angle, or cosine-weighted around the surface normal
+  (importance sampling of the Lambert term, so every ray carries the same
+  weight π · (1 + k·sin θ))
+- Each estimate averages `replicates` independent randomisations (random
+  jitter, Cranley–Patterson rotation for Halton, random digital shift for
+  Sobol); their spread gives a per-point standard error
+- `seed` makes every randomisation reproducible
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from batch import CIE_SKY_MULTIPLIER, ORIGIN_OFFSET, _normalize, ideal_horizontal_sky_component
+from obstruction import Scene, trace_occlusion
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+SEQUENCES = ('random', 'stratified', 'halton', 'sobol')
+DEFAULT_SAMPLES = 1024     # Rays per point, across all replicates
+DEFAULT_REPLICATES = 8     # Independent randomisations for the standard error
+
+# Direction numbers of the second Sobol dimension (primitive polynomial x + 1):
+# m_1 = 1, m_j = 2·m_(j-1) XOR m_(j-1); the first dimension is van der Corput
+_SOBOL_BITS = 32
+_SOBOL_M = [1]
+for _ in range(_SOBOL_BITS - 1):
+    _SOBOL_M.append((_SOBOL_M[-1] << 1) ^ _SOBOL_M[-1])
+_SOBOL_V = np.array([[1 << (_SOBOL_BITS - 1 - j) for j in range(_SOBOL_BITS)],
+                     [m << (_SOBOL_BITS - 1 - j) for j, m in enumerate(_SOBOL_M)]],
+                    dtype=np.uint64)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Unit-square Sequences
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _radical_inverse(indices: np.ndarray, base: int) -> np.ndarray:
+    result = np.zeros(len(indices))
+    scale = 1.0 / base
+    indices = indices.copy()
+    while indices.any():
+        result += (indices % base) * scale
+        indices //= base
+        scale /= base
+    return result
+
+
+def _sobol_2d(count: int, shift: np.ndarray) -> np.ndarray:
+    """First `count` points of the 2D Sobol sequence, XOR-shifted by `shift` (2 uint32)."""
+    indices = np.arange(count, dtype=np.uint64)
+    bits = (indices[:, None] >> np.arange(_SOBOL_BITS, dtype=np.uint64)) & 1
+    points = np.bitwise_xor.reduce(np.where(bits[:, None, :] == 1, _SOBOL_V[None], 0), axis=2)
+    points ^= shift.astype(np.uint64)
+    return points / float(1 << _SOBOL_BITS)
+
+
+def _strata(count: int) -> tuple[int, int]:
+    """Factor `count` into a grid as close to square as possible."""
+    rows = int(np.sqrt(count))
+    while count % rows:
+        rows -= 1
+    return rows, count // rows
+
+
+def unit_square_samples(sequence: str, count: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    One randomised point set in [0, 1)².
+
+    Args:
+        sequence: One of `SEQUENCES`
+        count: Number of points
+        rng: Source of the randomisation
+
+    Returns:
+        Points of shape (count, 2)
+    """
+    if sequence == 'random':
+        return rng.random((count, 2))
+    if sequence == 'stratified':
+        rows, cols = _strata(count)
+        i, j = np.divmod(np.arange(count), cols)
+        return (np.stack([i, j], axis=1) + rng.random((count, 2))) / [rows, cols]
+    if sequence == 'halton':
+        indices = np.arange(1, count + 1)
+        points = np.stack([_radical_inverse(indices, 2), _radical_inverse(indices, 3)], axis=1)
+        return (points + rng.random(2)) % 1.0
+    if sequence == 'sobol':
+        return _sobol_2d(count, rng.integers(0, 1 << _SOBOL_BITS, size=2, dtype=np.uint64))
+    raise ValueError(f"unknown sequence {sequence!r}; expected one of {SEQUENCES}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Direction Mappings
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def uniform_sky_directions(u: np.ndarray) -> np.ndarray:
+    """
+    Map unit-square points to the upper hemisphere, uniform in solid angle.
+
+    sin θ = u₀ and α = 2π·u₁, so every sample stands for 2π / M steradians.
+
+    Returns:
+        Directions of shape (M, 3)
+    """
+    z = u[:, 0]
+    alpha = 2 * np.pi * u[:, 1]
+    r = np.sqrt(1 - z**2)
+    return np.stack([r * np.cos(alpha), r * np.sin(alpha), z], axis=1)
+
+
+def cosine_weighted_directions(u: np.ndarray, normals: np.ndarray) -> np.ndarray:
+    """
+    Map unit-square points to hemispheres around each normal with pdf n·ω / π.
+
+    Args:
+        u: Unit-square points, shape (M, 2)
+        normals: Unit normals, shape (N, 3)
+
+    Returns:
+        Directions of shape (N, M, 3); some may point below the horizon
+    """
+    r = np.sqrt(u[:, 0])
+    phi = 2 * np.pi * u[:, 1]
+    local = np.stack([r * np.cos(phi), r * np.sin(phi), np.sqrt(1 - u[:, 0])], axis=1)
+
+    # Orthonormal frame per normal (tangent from whichever axis is least aligned)
+    helper = np.where(np.abs(normals[:, 2:3]) < 0.9, [[0.0, 0.0, 1.0]], [[1.0, 0.0, 0.0]])
+    tangent = _normalize(np.cross(helper, normals))
+    bitangent = np.cross(normals, tangent)
+    frames = np.stack([tangent, bitangent, normals], axis=1)  # (N, 3 local axes, 3)
+    return np.einsum('ml,nlj->nmj', local, frames)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Sampled VSC
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class SampledVSC:
+    """
+    VSC estimate with its uncertainty.
+
+    Attributes:
+        values: VSC estimates (percentage), shape (N,)
+        standard_error: Standard error of each estimate (percentage), shape (N,)
+        sample_count: Rays per point, across all replicates
+        sequence: Unit-square sequence used
+        cosine_weighted: True if directions were importance-sampled
+    """
+    values: np.ndarray
+    standard_error: np.ndarray
+    sample_count: int
+    sequence: str
+    cosine_weighted: bool
+
+
+def compute_vsc_sampled(
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    samples: int = DEFAULT_SAMPLES,
+    sequence: str = 'sobol',
+    cosine_weighted: bool = True,
+    replicates: int = DEFAULT_REPLICATES,
+    seed: int | None = 0,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+    origin_offset: float = ORIGIN_OFFSET,
+) -> SampledVSC:
+    """
+    Estimate the VSC with randomised sampling instead of the lattice.
+
+    Args:
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3); normalised internally
+        scene: Obstruction scene, or None for an unobstructed sky
+        samples: Rays per point; split evenly over the replicates. Powers
+            of two suit Sobol best
+        sequence: One of `SEQUENCES`
+        cosine_weighted: Importance-sample the Lambert term around each
+            normal instead of sampling the sky uniformly
+        replicates: Independent randomisations (at least 2 for an error)
+        seed: Seed for all randomisations; None for fresh entropy
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ)
+        origin_offset: Distance to lift ray origins off the surface
+
+    Returns:
+        Estimates and standard errors per point
+    """
+    if replicates < 1 or samples < replicates:
+        raise ValueError(f"need 1 <= replicates <= samples, got {replicates} and {samples}")
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = _normalize(normals)
+    per_replicate = samples // replicates
+    scale = 100 / ideal_horizontal_sky_component(sky_multiplier)
+    rng = np.random.default_rng(seed)
+
+    estimates = np.empty((replicates, len(points)))
+    for r in range(replicates):
+        u = unit_square_samples(sequence, per_replicate, rng)
+        if cosine_weighted:
+            directions = cosine_weighted_directions(u, normals)
+            weights = np.pi * (1 + sky_multiplier * directions[..., 2]) * (directions[..., 2] > 0)
+        else:
+            directions = np.broadcast_to(uniform_sky_directions(u), (len(points), per_replicate, 3))
+            surface_flux = np.clip(np.einsum('nmj,nj->nm', directions, normals), 0.0, None)
+            weights = 2 * np.pi * surface_flux * (1 + sky_multiplier * directions[..., 2])
+
+        if scene is not None and scene.triangle_count:
+            point_idx, sample_idx = np.nonzero(weights > 0)
+            origins = points[point_idx] + origin_offset * normals[point_idx]
+            blocked = trace_occlusion(scene.bvh, origins, directions[point_idx, sample_idx])
+            weights[point_idx[blocked], sample_idx[blocked]] = 0.0
+
+        estimates[r] = scale * weights.mean(axis=1)
+
+    if replicates > 1:
+        standard_error = estimates.std(axis=0, ddof=1) / np.sqrt(replicates)
+    else:
+        standard_error = np.full(len(points), np.nan)
+    return SampledVSC(estimates.mean(axis=0), standard_error, per_replicate * replicates,
+                      sequence, cosine_weighted)
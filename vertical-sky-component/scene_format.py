@@ -0,0 +1,363 @@
+"""
+Binary Scene Format
+
+A compact, memory-mappable file holding the obstruction meshes together
+with their prebuilt, flattened BVH. Loading a scene is a header parse plus a
+handful of `np.memmap` views: no text parsing and no BVH rebuild, and every
+worker process mapping the same file shares one page-cached copy.
+
+File layout (little-endian):
+- 8 bytes   magic b'VSCSCN01'
+- 8 bytes   uint64 length of the JSON header
+- N bytes   JSON header: mesh names and {name: dtype, shape, offset} per array
+- padding   so every array starts on a 64-byte boundary
+- arrays    raw C-ordered data
+
+Converters read Wavefront OBJ and PLY (ASCII or binary) from local files:
+
+    python scene_format.py city.obj city.vscscene
+"""
+
+import argparse
+import functools
+import json
+import os
+import struct
+
+import numpy as np
+
+from obstruction import BVH_LEAF_SIZE, FlatBVH, Mesh, Scene, build_bvh
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+MAGIC = b'VSCSCN01'
+ALIGNMENT = 64          # Array alignment in bytes (cache line / SIMD friendly)
+SCENE_SUFFIX = '.vscscene'
+
+BVH_FIELDS = ('bounds_min', 'bounds_max', 'left', 'right', 'start', 'count',
+              'triangles', 'triangle_ids')
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Writing and Reading
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_scene(scene: Scene, path: str | os.PathLike) -> None:
+    """
+    Write a scene and its BVH to a binary scene file.
+
+    The BVH is built first if the scene does not have one yet.
+
+    Args:
+        scene: Scene to write
+        path: Destination file
+    """
+    meshes = scene.meshes
+    arrays = {
+        'vertices': np.concatenate([m.vertices for m in meshes] or [np.empty((0, 3))]),
+        'indices': np.concatenate([m.triangles for m in meshes] or [np.empty((0, 3), np.int64)]),
+        'vertex_offsets': np.cumsum([0] + [len(m.vertices) for m in meshes], dtype=np.int64),
+        'triangle_offsets': np.cumsum([0] + [len(m.triangles) for m in meshes], dtype=np.int64),
+    }
+    bvh = scene.bvh
+    arrays.update({f'bvh_{name}': getattr(bvh, name) for name in BVH_FIELDS})
+    arrays = {name: np.ascontiguousarray(a).astype(a.dtype.newbyteorder('<'), copy=False)
+              for name, a in arrays.items()}
+
+    # The header stores absolute offsets, so size it until the offsets settle
+    header = {'meshes': [m.name for m in meshes], 'arrays': {}}
+    data_start = 0
+    while True:
+        offset = data_start
+        for name, array in arrays.items():
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                                      'offset': offset}
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps(header).encode()
+        needed = _align(len(MAGIC) + 8 + len(encoded))
+        if needed == data_start:
+            break
+        data_start = needed
+
+    tmp_path = f'{os.fspath(path)}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(encoded)))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(header['arrays'][name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, path)  # Readers never see a half-written file
+
+
+def load_scene(path: str | os.PathLike) -> Scene:
+    """
+    Open a binary scene file without copying its data.
+
+    Mesh and BVH arrays are read-only `np.memmap` views of the file.
+
+    Args:
+        path: Scene file written by `save_scene`
+
+    Returns:
+        Scene with its BVH already attached
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a VSC scene file")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length))
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if np.prod(shape) == 0:
+            arrays[name] = np.empty(shape, dtype=spec['dtype'])
+        else:
+            arrays[name] = np.memmap(path, dtype=spec['dtype'], mode='r',
+                                     offset=spec['offset'], shape=shape)
+
+    v_off, t_off = arrays['vertex_offsets'], arrays['triangle_offsets']
+    meshes = [Mesh(arrays['vertices'][v_off[i]:v_off[i + 1]],
+                   arrays['indices'][t_off[i]:t_off[i + 1]], name)
+              for i, name in enumerate(header['meshes'])]
+
+    scene = Scene(meshes)
+    scene._bvh = FlatBVH(**{name: arrays[f'bvh_{name}'] for name in BVH_FIELDS})
+    return scene
+
+
+@functools.lru_cache(maxsize=8)
+def _open_scene_cached(path: str, mtime_ns: int, size: int) -> Scene:
+    return load_scene(path)
+
+
+def open_scene(path: str | os.PathLike) -> Scene:
+    """
+    `load_scene` memoised per process; re-opens the file if it changed.
+
+    Worker processes use this so each maps a scene file once, however many
+    chunks they compute from it.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return _open_scene_cached(path, stat.st_mtime_ns, stat.st_size)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Mesh Import
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _fan_triangulate(polygon: list[int]) -> list[tuple[int, int, int]]:
+    return [(polygon[0], polygon[i], polygon[i + 1]) for i in range(1, len(polygon) - 1)]
+
+
+def read_obj(path: str | os.PathLike) -> list[Mesh]:
+    """
+    Read a Wavefront OBJ file.
+
+    Each `o`/`g` group becomes its own mesh; polygons are fan-triangulated.
+    Texture coordinates, normals and materials are ignored.
+
+    Returns:
+        One mesh per non-empty group
+    """
+    vertices: list[list[float]] = []
+    groups: dict[str, list[tuple[int, int, int]]] = {}
+    current = groups.setdefault(os.path.splitext(os.path.basename(path))[0], [])
+
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == 'v':
+                vertices.append([float(x) for x in parts[1:4]])
+            elif parts[0] == 'f':
+                polygon = []
+                for token in parts[1:]:
+                    index = int(token.split('/')[0])
+                    polygon.append(index - 1 if index > 0 else len(vertices) + index)
+                current.extend(_fan_triangulate(polygon))
+            elif parts[0] in ('o', 'g') and len(parts) > 1:
+                current = groups.setdefault(' '.join(parts[1:]), [])
+
+    all_vertices = np.array(vertices, dtype=np.float64).reshape(-1, 3)
+    meshes = []
+    for name, faces in groups.items():
+        if not faces:
+            continue
+        used, local = np.unique(np.array(faces, dtype=np.int64), return_inverse=True)
+        meshes.append(Mesh(all_vertices[used], local.reshape(-1, 3), name))
+    return meshes
+
+
+_PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+
+def read_ply(path: str | os.PathLike) -> list[Mesh]:
+    """
+    Read a PLY file (ASCII, binary little- or big-endian).
+
+    Uses the x, y, z vertex properties and the `vertex_indices` (or
+    `vertex_index`) face list; other properties are skipped.
+
+    Returns:
+        A single mesh named after the file
+    """
+    with open(path, 'rb') as f:
+        if f.readline().strip() != b'ply':
+            raise ValueError(f"{path} is not a PLY file")
+        fmt, elements = None, []
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path}: unexpected end of PLY header")
+            parts = line.decode('ascii', errors='replace').split()
+            if not parts or parts[0] in ('comment', 'obj_info'):
+                continue
+            if parts[0] == 'end_header':
+                break
+            if parts[0] == 'format':
+                fmt = parts[1]
+            elif parts[0] == 'element':
+                elements.append({'name': parts[1], 'count': int(parts[2]), 'props': []})
+            elif parts[0] == 'property':
+                if parts[1] == 'list':
+                    prop = (parts[4], 'list', _PLY_TYPES[parts[2]], _PLY_TYPES[parts[3]])
+                else:
+                    prop = (parts[2], 'scalar', _PLY_TYPES[parts[1]], None)
+                elements[-1]['props'].append(prop)
+        body = f.read()
+
+    if fmt == 'ascii':
+        vertices, faces = _read_ply_ascii(body, elements)
+    elif fmt in ('binary_little_endian', 'binary_big_endian'):
+        vertices, faces = _read_ply_binary(body, elements, '<' if fmt.endswith('little_endian') else '>')
+    else:
+        raise ValueError(f"{path}: unsupported PLY format {fmt!r}")
+
+    triangles = [tri for polygon in faces for tri in _fan_triangulate(list(polygon))]
+    name = os.path.splitext(os.path.basename(path))[0]
+    return [Mesh(vertices, np.array(triangles, dtype=np.int64).reshape(-1, 3), name)]
+
+
+def _read_ply_ascii(body: bytes, elements: list[dict]) -> tuple[np.ndarray, list]:
+    lines = iter(body.decode('ascii', errors='replace').splitlines())
+    vertices, faces = np.empty((0, 3)), []
+    for element in elements:
+        names = [p[0] for p in element['props']]
+        rows = [next(lines).split() for _ in range(element['count'])]
+        if element['name'] == 'vertex':
+            xyz = [names.index(axis) for axis in 'xyz']
+            vertices = np.array([[float(row[i]) for i in xyz] for row in rows]).reshape(-1, 3)
+        elif element['name'] == 'face':
+            # Assumes the index list is the face's first property, as in practice it is
+            faces = [[int(x) for x in row[1:1 + int(row[0])]] for row in rows]
+    return vertices, faces
+
+
+def _read_ply_binary(body: bytes, elements: list[dict], order: str) -> tuple[np.ndarray, list]:
+    offset = 0
+    vertices, faces = np.empty((0, 3)), []
+    for element in elements:
+        props = element['props']
+        if all(kind == 'scalar' for _, kind, _, _ in props):
+            dtype = np.dtype([(name, order + t) for name, _, t, _ in props])
+            data = np.frombuffer(body, dtype=dtype, count=element['count'], offset=offset)
+            offset += dtype.itemsize * element['count']
+            if element['name'] == 'vertex':
+                vertices = np.stack([data[axis].astype(np.float64) for axis in 'xyz'], axis=1)
+            continue
+
+        # Fast path: a face element whose only property is a list of triangles
+        if len(props) == 1 and element['count']:
+            _, _, count_t, index_t = props[0]
+            dtype = np.dtype([('n', order + count_t), ('idx', order + index_t, (3,))])
+            size = dtype.itemsize * element['count']
+            if offset + size <= len(body):
+                data = np.frombuffer(body, dtype=dtype, count=element['count'], offset=offset)
+                if np.all(data['n'] == 3):
+                    offset += size
+                    if element['name'] == 'face':
+                        faces = data['idx'].astype(np.int64)
+                    continue
+
+        rows = []
+        for _ in range(element['count']):
+            row = {}
+            for name, kind, t, index_t in props:
+                if kind == 'scalar':
+                    row[name] = np.frombuffer(body, order + t, 1, offset)[0]
+                    offset += np.dtype(t).itemsize
+                else:
+                    n = int(np.frombuffer(body, order + t, 1, offset)[0])
+                    offset += np.dtype(t).itemsize
+                    row[name] = np.frombuffer(body, order + index_t, n, offset)
+                    offset += np.dtype(index_t).itemsize * n
+            rows.append(row)
+        if element['name'] == 'face':
+            key = 'vertex_indices' if rows and 'vertex_indices' in rows[0] else 'vertex_index'
+            faces = [row[key] for row in rows]
+    return vertices, faces
+
+
+MESH_READERS = {'.obj': read_obj, '.ply': read_ply}
+
+
+def convert_meshes(inputs: list[str | os.PathLike], output: str | os.PathLike,
+                   leaf_size: int = BVH_LEAF_SIZE) -> Scene:
+    """
+    Convert mesh files into one binary scene file with a prebuilt BVH.
+
+    Args:
+        inputs: OBJ/PLY files to combine into a single scene
+        output: Destination scene file
+        leaf_size: Maximum triangles per BVH leaf
+
+    Returns:
+        The converted scene
+    """
+    meshes = []
+    for path in inputs:
+        suffix = os.path.splitext(os.fspath(path))[1].lower()
+        if suffix not in MESH_READERS:
+            raise ValueError(f"{path}: unsupported mesh format {suffix!r} "
+                             f"(expected one of {', '.join(MESH_READERS)})")
+        meshes.extend(MESH_READERS[suffix](path))
+
+    scene = Scene(meshes)
+    scene._bvh = build_bvh(scene.triangles(), leaf_size)
+    save_scene(scene, output)
+    return scene
+
+
+def main():
+    """Command line entry point for mesh conversion."""
+    parser = argparse.ArgumentParser(description="Convert OBJ/PLY meshes to a VSC scene file")
+    parser.add_argument('inputs', nargs='+', help="OBJ or PLY files")
+    parser.add_argument('output', help=f"destination file (e.g. city{SCENE_SUFFIX})")
+    parser.add_argument('--leaf-size', type=int, default=BVH_LEAF_SIZE,
+                        help="maximum triangles per BVH leaf")
+    args = parser.parse_args()
+
+    scene = convert_meshes(args.inputs, args.output, args.leaf_size)
+    print(f"✓ Wrote {args.output}: {len(scene.meshes)} meshes, "
+          f"{scene.triangle_count} triangles, {scene.bvh.node_count} BVH nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,11 @@ Terminology:
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import cm
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
 from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 
 
 def spherical_to_cartesian(elevation_rad, azimuth_rad, radius=1.0):
@@ -43,23 +47,25 @@ def plot_elevation_rings():
     ax1 = fig.add_subplot(131, projection='3d')
 
     azimuth = np.linspace(0, 2*np.pi, 100)
-    elevations = [0, 15, 30, 45, 60, 75, 90]  # degrees
+    elevations = np.array([0, 15, 30, 45, 60, 75, 90])  # degrees
+    elev_rad = np.radians(elevations)
     colors = cm.viridis(np.linspace(0, 1, len(elevations)))
 
-    for elev_deg, color in zip(elevations, colors):
-        elev_rad = np.radians(elev_deg)
-        x, y, z = spherical_to_cartesian(elev_rad, azimuth)
+    # All rings except the zenith (a point) as one collection
+    x, y, z = spherical_to_cartesian(elev_rad[:-1, None], azimuth[None, :])
+    rings = np.stack(np.broadcast_arrays(x, y, z), axis=-1)
+    ax1.add_collection3d(Line3DCollection(rings, colors=colors[:-1], linewidths=2))
+    zenith = ax1.scatter([0], [0], [1], c=colors[-1:], s=100,
+                         label=f'θ = {elevations[-1]}° (zenith)')
 
-        if elev_deg == 90:  # Zenith is a point
-            ax1.scatter([0], [0], [1], c=[color], s=100, label=f'θ = {elev_deg}° (zenith)')
-        else:
-            ax1.plot(x, y, z, c=color, linewidth=2, label=f'θ = {elev_deg}°')
+    handles = [Line2D([], [], color=color, linewidth=2, label=f'θ = {elev_deg}°')
+               for elev_deg, color in zip(elevations[:-1], colors[:-1])]
 
     ax1.set_xlabel('X')
     ax1.set_ylabel('Y')
     ax1.set_zlabel('Z (up)')
     ax1.set_title('Elevation Angle (θ)\nRings of constant elevation')
-    ax1.legend(loc='upper left', fontsize=8)
+    ax1.legend(handles=handles + [zenith], loc='upper left', fontsize=8)
     ax1.set_xlim(-1.1, 1.1)
     ax1.set_ylim(-1.1, 1.1)
     ax1.set_zlim(0, 1.1)
@@ -67,14 +73,14 @@ def plot_elevation_rings():
     # Side view (X-Z plane)
     ax2 = fig.add_subplot(132)
 
-    for elev_deg, color in zip(elevations, colors):
-        elev_rad = np.radians(elev_deg)
-        # Draw arc in X-Z plane
-        theta_range = np.linspace(0, np.pi, 50)
-        x = np.cos(elev_rad) * np.cos(theta_range)
-        z = np.sin(elev_rad) * np.ones_like(theta_range)
-        ax2.axhline(y=np.sin(elev_rad), color=color, linewidth=2,
-                   label=f'θ = {elev_deg}°, z = {np.sin(elev_rad):.2f}')
+    # Horizontal lines spanning the full x-range (set below)
+    heights = np.sin(elev_rad)
+    segments = np.stack([np.stack([np.full_like(heights, -1.2), heights], axis=-1),
+                         np.stack([np.full_like(heights, 1.2), heights], axis=-1)], axis=1)
+    ax2.add_collection(LineCollection(segments, colors=colors, linewidths=2))
+    handles = [Line2D([], [], color=color, linewidth=2,
+                      label=f'θ = {elev_deg}°, z = {z:.2f}')
+               for elev_deg, z, color in zip(elevations, heights, colors)]
 
     # Draw dome outline
     theta_outline = np.linspace(0, np.pi/2, 50)
@@ -87,18 +93,19 @@ def plot_elevation_rings():
     ax2.set_aspect('equal')
     ax2.set_xlim(-1.2, 1.2)
     ax2.set_ylim(-0.1, 1.2)
-    ax2.legend(fontsize=8, loc='upper right')
+    ax2.legend(handles=handles, fontsize=8, loc='upper right')
     ax2.grid(True, alpha=0.3)
 
     # Top-down view showing radial distance
     ax3 = fig.add_subplot(133)
 
-    for elev_deg, color in zip(elevations, colors):
-        elev_rad = np.radians(elev_deg)
-        r = np.cos(elev_rad)  # Radial distance in projection
-        circle = plt.Circle((0, 0), r, fill=False, color=color, linewidth=2,
-                           label=f'θ = {elev_deg}°, r = {r:.2f}')
-        ax3.add_patch(circle)
+    radii = np.cos(elev_rad)  # Radial distance in projection
+    circles = [plt.Circle((0, 0), r) for r in radii]
+    ax3.add_collection(PatchCollection(circles, facecolors='none', edgecolors=colors,
+                                       linewidths=2))
+    handles = [Patch(facecolor='none', edgecolor=color, linewidth=2,
+                     label=f'θ = {elev_deg}°, r = {r:.2f}')
+               for elev_deg, r, color in zip(elevations, radii, colors)]
 
     ax3.set_xlabel('X')
     ax3.set_ylabel('Y')
@@ -106,7 +113,7 @@ def plot_elevation_rings():
     ax3.set_aspect('equal')
     ax3.set_xlim(-1.3, 1.3)
     ax3.set_ylim(-1.3, 1.3)
-    ax3.legend(fontsize=8, loc='upper right')
+    ax3.legend(handles=handles, fontsize=8, loc='upper right')
     ax3.grid(True, alpha=0.3)
 
     plt.tight_layout()
@@ -122,18 +129,20 @@ def plot_azimuth_lines():
 
     elevation = np.linspace(0, np.pi/2, 50)
     azimuths = np.linspace(0, 360, 13)[:-1]  # 0, 30, 60, ..., 330 degrees
+    azim_rad = np.radians(azimuths)
     colors = cm.hsv(np.linspace(0, 1, len(azimuths)))
 
-    for azim_deg, color in zip(azimuths, colors):
-        azim_rad = np.radians(azim_deg)
-        x, y, z = spherical_to_cartesian(elevation, azim_rad)
-        ax1.plot(x, y, z, c=color, linewidth=2, label=f'α = {int(azim_deg)}°')
+    x, y, z = spherical_to_cartesian(elevation[None, :], azim_rad[:, None])
+    meridians = np.stack(np.broadcast_arrays(x, y, z), axis=-1)
+    ax1.add_collection3d(Line3DCollection(meridians, colors=colors, linewidths=2))
+    handles = [Line2D([], [], color=color, linewidth=2, label=f'α = {int(azim_deg)}°')
+               for azim_deg, color in zip(azimuths, colors)]
 
     ax1.set_xlabel('X')
     ax1.set_ylabel('Y')
     ax1.set_zlabel('Z (up)')
     ax1.set_title('Azimuth Angle (α)\nRadial lines from center')
-    ax1.legend(loc='upper left', fontsize=7, ncol=2)
+    ax1.legend(handles=handles, loc='upper left', fontsize=7, ncol=2)
     ax1.set_xlim(-1.1, 1.1)
     ax1.set_ylim(-1.1, 1.1)
     ax1.set_zlim(0, 1.1)
@@ -141,17 +150,15 @@ def plot_azimuth_lines():
     # Top-down view
     ax2 = fig.add_subplot(132)
 
-    for azim_deg, color in zip(azimuths, colors):
-        azim_rad = np.radians(azim_deg)
-        x_end = np.cos(azim_rad)
-        y_end = np.sin(azim_rad)
-        ax2.plot([0, x_end], [0, y_end], c=color, linewidth=2,
-                label=f'α = {int(azim_deg)}°')
-        ax2.scatter([x_end], [y_end], c=[color], s=50)
+    x_end = np.cos(azim_rad)
+    y_end = np.sin(azim_rad)
+    spokes = np.stack([np.zeros((len(azimuths), 2)), np.stack([x_end, y_end], axis=-1)], axis=1)
+    ax2.add_collection(LineCollection(spokes, colors=colors, linewidths=2))
+    ax2.scatter(x_end, y_end, c=colors, s=50)
 
     # Horizon circle
     theta = np.linspace(0, 2*np.pi, 100)
-    ax2.plot(np.cos(theta), np.sin(theta), 'k--', alpha=0.3, label='Horizon')
+    horizon, = ax2.plot(np.cos(theta), np.sin(theta), 'k--', alpha=0.3, label='Horizon')
 
     ax2.set_xlabel('X = cos(α)')
     ax2.set_ylabel('Y = sin(α)')
@@ -159,7 +166,7 @@ def plot_azimuth_lines():
     ax2.set_aspect('equal')
     ax2.set_xlim(-1.3, 1.3)
     ax2.set_ylim(-1.3, 1.3)
-    ax2.legend(fontsize=7, loc='upper right', ncol=2)
+    ax2.legend(handles=handles + [horizon], fontsize=7, loc='upper right', ncol=2)
     ax2.grid(True, alpha=0.3)
 
     # Azimuth as color wheel
@@ -189,16 +196,15 @@ def plot_combined_grid():
     elevations = np.linspace(0, 80, n_elevation)  # degrees
     azimuths = np.linspace(0, 330, n_azimuth)     # degrees
 
+    # Full grid, one entry per sample point
+    ELEV, AZIM = np.meshgrid(elevations, azimuths, indexing='ij')
+    ELEV, AZIM = ELEV.ravel(), AZIM.ravel()
+    x, y, z = spherical_to_cartesian(np.radians(ELEV), np.radians(AZIM))
+    elevation_colors = cm.viridis(ELEV / 90)
+
     # 3D view - colored by elevation
     ax1 = fig.add_subplot(221, projection='3d')
-
-    for elev_deg in elevations:
-        elev_rad = np.radians(elev_deg)
-        for azim_deg in azimuths:
-            azim_rad = np.radians(azim_deg)
-            x, y, z = spherical_to_cartesian(elev_rad, azim_rad)
-            color = cm.viridis(elev_deg / 90)
-            ax1.scatter([x], [y], [z], c=[color], s=50, alpha=0.8)
+    ax1.scatter(x, y, z, c=elevation_colors, s=50, alpha=0.8, depthshade=False)
 
     ax1.set_xlabel('X')
     ax1.set_ylabel('Y')
@@ -214,14 +220,7 @@ def plot_combined_grid():
 
     # 3D view - colored by azimuth
     ax2 = fig.add_subplot(222, projection='3d')
-
-    for elev_deg in elevations:
-        elev_rad = np.radians(elev_deg)
-        for azim_deg in azimuths:
-            azim_rad = np.radians(azim_deg)
-            x, y, z = spherical_to_cartesian(elev_rad, azim_rad)
-            color = cm.hsv(azim_deg / 360)
-            ax2.scatter([x], [y], [z], c=[color], s=50, alpha=0.8)
+    ax2.scatter(x, y, z, c=cm.hsv(AZIM / 360), s=50, alpha=0.8, depthshade=False)
 
     ax2.set_xlabel('X')
     ax2.set_ylabel('Y')
@@ -236,33 +235,26 @@ def plot_combined_grid():
 
     # Top-down projection with both angles labeled
     ax3 = fig.add_subplot(223)
-
-    for elev_deg in elevations:
-        elev_rad = np.radians(elev_deg)
-        r = np.cos(elev_rad)  # Projected radius
-
-        for azim_deg in azimuths:
-            azim_rad = np.radians(azim_deg)
-            x = r * np.cos(azim_rad)
-            y = r * np.sin(azim_rad)
-            color = cm.viridis(elev_deg / 90)
-            ax3.scatter([x], [y], c=[color], s=50, alpha=0.8)
+    # Projected radius is cos(θ), so the top-down position is just (x, y)
+    ax3.scatter(x, y, c=elevation_colors, s=50, alpha=0.8)
 
     # Draw elevation rings
-    for elev_deg in [0, 30, 60]:
-        r = np.cos(np.radians(elev_deg))
-        circle = plt.Circle((0, 0), r, fill=False, color='gray',
-                           linestyle='--', alpha=0.5)
-        ax3.add_patch(circle)
+    ring_elevations = [0, 30, 60]
+    ring_radii = np.cos(np.radians(ring_elevations))
+    ax3.add_collection(PatchCollection([plt.Circle((0, 0), r) for r in ring_radii],
+                                       facecolors='none', edgecolors='gray',
+                                       linestyles='--', alpha=0.5))
+    for elev_deg, r in zip(ring_elevations, ring_radii):
         ax3.text(r + 0.05, 0, f'θ={elev_deg}°', fontsize=9, alpha=0.7)
 
     # Draw azimuth lines
-    for azim_deg in [0, 90, 180, 270]:
-        azim_rad = np.radians(azim_deg)
-        ax3.plot([0, np.cos(azim_rad)], [0, np.sin(azim_rad)],
-                'gray', linestyle='--', alpha=0.5)
-        ax3.text(1.1*np.cos(azim_rad), 1.1*np.sin(azim_rad),
-                f'α={azim_deg}°', fontsize=9, ha='center')
+    line_azimuths = [0, 90, 180, 270]
+    line_rad = np.radians(line_azimuths)
+    ends = np.stack([np.cos(line_rad), np.sin(line_rad)], axis=-1)
+    ax3.add_collection(LineCollection(np.stack([np.zeros_like(ends), ends], axis=1),
+                                      colors='gray', linestyles='--', alpha=0.5))
+    for azim_deg, (x_end, y_end) in zip(line_azimuths, ends):
+        ax3.text(1.1*x_end, 1.1*y_end, f'α={azim_deg}°', fontsize=9, ha='center')
 
     ax3.set_xlabel('X')
     ax3.set_ylabel('Y')
@@ -354,12 +346,11 @@ def plot_angle_values_on_dome():
         (90, 0, 'ZENITH', 'black'),
     ]
 
-    for elev_deg, azim_deg, label, color in labeled_points:
-        elev_rad = np.radians(elev_deg)
-        azim_rad = np.radians(azim_deg)
-        x, y, z = spherical_to_cartesian(elev_rad, azim_rad)
-        ax1.scatter([x], [y], [z], c=color, s=100, zorder=5)
-        ax1.text(x*1.15, y*1.15, z+0.05, label, fontsize=9, color=color)
+    elev_deg, azim_deg, labels, point_colors = zip(*labeled_points)
+    x, y, z = spherical_to_cartesian(np.radians(elev_deg), np.radians(azim_deg))
+    ax1.scatter(x, y, z, c=point_colors, s=100, zorder=5, depthshade=False)
+    for xi, yi, zi, label, color in zip(x, y, z, labels, point_colors):
+        ax1.text(xi*1.15, yi*1.15, zi+0.05, label, fontsize=9, color=color)
 
     ax1.set_xlabel('X (East)')
     ax1.set_ylabel('Y (North)')
@@ -384,17 +375,17 @@ def plot_angle_values_on_dome():
     ax2.plot(-x_dome, z_dome, 'b-', linewidth=3)
 
     # Mark specific angles
-    angles_to_mark = [0, 15, 30, 45, 60, 75, 90]
-    for theta_deg in angles_to_mark:
-        theta_rad = np.radians(theta_deg)
-        x = np.cos(theta_rad)
-        z = np.sin(theta_rad)
+    angles_to_mark = np.array([0, 15, 30, 45, 60, 75, 90])
+    marks = np.stack([np.cos(np.radians(angles_to_mark)),
+                      np.sin(np.radians(angles_to_mark))], axis=-1)
 
-        # Draw radial line from origin
-        ax2.plot([0, x], [0, z], 'gray', linestyle='--', alpha=0.5)
-        ax2.scatter([x], [z], s=80, zorder=5)
+    # Radial lines from origin, and one marker per angle in cycle colors
+    ax2.add_collection(LineCollection(np.stack([np.zeros_like(marks), marks], axis=1),
+                                      colors='gray', linestyles='--', alpha=0.5))
+    ax2.scatter(marks[:, 0], marks[:, 1], s=80, zorder=5,
+                c=[f'C{i}' for i in range(len(angles_to_mark))])
 
-        # Add label
+    for theta_deg, (x, z) in zip(angles_to_mark, marks):
         ax2.annotate(f'θ={theta_deg}°\nz={z:.2f}',
                     xy=(x, z), xytext=(x+0.15, z+0.05),
                     fontsize=9, ha='left',
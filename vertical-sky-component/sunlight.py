@@ -0,0 +1,294 @@
+"""
+Annual Probable Sunlight Hours
+
+Computes annual probable sunlight hours (APSH) for windows with the same
+obstruction engine as the VSC. Like the VSC, APSH is an integral of
+visibility over the sky, taken over the sun's path instead of the
+`compute_ray_directions` grid.
+
+Key concepts:
+- `sun_table` precomputes sun directions over a year for one latitude and
+  time step, each weighted by its duration and the probability of sunshine
+  in its month; tables are cached per argument set
+- A window receives a sun position if the sun is in front of it (n·s > 0)
+  and the ray towards it is unobstructed
+- APSH = received weight / total weight × 100; winter APSH only counts sun
+  positions between 21 September and 21 March, still as a share of the
+  annual total. BRE guidance: at least 25% annual and 5% in winter
+- `compute_vsc_and_apsh` is a convenience wrapper returning both results in
+  one array. It traces the lattice and the exact sun directions as separate
+  rays, so it costs as much as `compute_vsc_batch` plus `compute_apsh` and
+  its APSH matches `compute_apsh`. With `snap_to_lattice=True` it reads each
+  sun position's visibility from the lattice cell it falls in instead: no
+  extra rays, but only an estimate (errors of over 1 APSH point near
+  obstruction edges), so no pass/fail result is reported
+
+Frame: +x east, +y north, +z up; `north_angle` rotates true north
+counter-clockwise from +y for scenes in other orientations. Sun positions
+use solar time, which is all APSH needs.
+"""
+
+import functools
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from batch import (CIE_SKY_MULTIPLIER, ORIGIN_OFFSET, _normalize, compute_visibility,
+                   hemisphere_directions, sky_weights)
+from main import HORIZONTAL_ANGLE_RESOLUTION, VERTICAL_ANGLE_RESOLUTION
+from obstruction import Scene, trace_occlusion
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+DEFAULT_LATITUDE = 51.5        # Degrees north (London)
+DEFAULT_TIME_STEP = 60         # Minutes between sun positions within a day
+DEFAULT_DAY_STEP = 5           # Days between sampled days
+AXIAL_TILT = 23.44             # Degrees
+
+BRE_APSH_TARGET = 25.0         # Annual APSH (%) a window should receive
+BRE_WINTER_APSH_TARGET = 5.0   # Winter APSH (%) a window should receive
+
+WINTER_START_DAY = 264         # 21 September (day of year, 1-based, non-leap)
+WINTER_END_DAY = 80            # 21 March
+_MONTH_STARTS = np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30])  # 0-based days
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Sun Positions
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class SunTable:
+    """
+    Sun positions above the horizon over one year.
+
+    Attributes:
+        directions: Unit vectors towards the sun, shape (S, 3)
+        weights: Probable sunlight hours each position stands for, shape (S,)
+        winter: True for positions between 21 September and 21 March, shape (S,)
+        day: Day of year (1-365) of each position, shape (S,)
+        solar_hour: Solar time (hours) of each position, shape (S,)
+    """
+    directions: np.ndarray
+    weights: np.ndarray
+    winter: np.ndarray
+    day: np.ndarray
+    solar_hour: np.ndarray
+
+    @property
+    def total_hours(self) -> float:
+        """Annual probable sunlight hours with an unobstructed horizon."""
+        return float(self.weights.sum())
+
+
+@functools.lru_cache(maxsize=32)
+def _sun_table_cached(latitude: float, time_step: float, day_step: int, north_angle: float,
+                      monthly_sunshine: tuple[float, ...]) -> SunTable:
+    days = np.arange(1, 366, day_step)
+    hours = np.arange(time_step / 2, 24 * 60, time_step) / 60
+    day, solar_hour = (a.reshape(-1) for a in np.meshgrid(days, hours, indexing='ij'))
+
+    phi = np.radians(latitude)
+    declination = np.radians(AXIAL_TILT) * np.sin(2 * np.pi * (284 + day) / 365)
+    hour_angle = np.radians(15 * (solar_hour - 12))
+
+    east = -np.cos(declination) * np.sin(hour_angle)
+    north = np.sin(declination) * np.cos(phi) - np.cos(declination) * np.sin(phi) * np.cos(hour_angle)
+    up = np.sin(declination) * np.sin(phi) + np.cos(declination) * np.cos(phi) * np.cos(hour_angle)
+
+    rotation = np.radians(north_angle)
+    directions = np.stack([east * np.cos(rotation) - north * np.sin(rotation),
+                           east * np.sin(rotation) + north * np.cos(rotation), up], axis=1)
+    above = up > 0
+
+    month = np.searchsorted(_MONTH_STARTS, day - 1, side='right') - 1
+    weights = (time_step / 60) * day_step * np.asarray(monthly_sunshine)[month]
+    winter = (day >= WINTER_START_DAY) | (day <= WINTER_END_DAY)
+
+    table = SunTable(directions[above], weights[above], winter[above], day[above], solar_hour[above])
+    for array in (table.directions, table.weights, table.winter, table.day, table.solar_hour):
+        array.flags.writeable = False  # Shared between callers through the cache
+    return table
+
+
+def sun_table(
+    latitude: float = DEFAULT_LATITUDE,
+    time_step: float = DEFAULT_TIME_STEP,
+    day_step: int = DEFAULT_DAY_STEP,
+    north_angle: float = 0.0,
+    monthly_sunshine: Sequence[float] | None = None,
+) -> SunTable:
+    """
+    Sun positions for one latitude and sampling, cached per argument set.
+
+    Args:
+        latitude: Site latitude in degrees (negative south of the equator)
+        time_step: Minutes between positions within a day
+        day_step: Days between sampled days; weights are scaled to match
+        north_angle: Rotation of true north counter-clockwise from +y (degrees)
+        monthly_sunshine: Probability of sunshine per month (12 values,
+            January first), e.g. from local climate data; default 1 for all
+
+    Returns:
+        Read-only sun table
+    """
+    sunshine = tuple(float(p) for p in (monthly_sunshine or [1.0] * 12))
+    if len(sunshine) != 12:
+        raise ValueError(f"monthly_sunshine needs 12 values, got {len(sunshine)}")
+    return _sun_table_cached(float(latitude), float(time_step), int(day_step),
+                             float(north_angle), sunshine)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# APSH
+# ═══════════════════════════════════════════════════════════════════════════════
+
+APSH_DTYPE = np.dtype([
+    ('apsh', np.float64),          # Annual probable sunlight hours received (%)
+    ('winter_apsh', np.float64),   # Share received 21 Sep - 21 Mar (% of annual)
+    ('passes', np.bool_),          # Both BRE targets met
+])
+
+
+def _apsh_from_received(received: np.ndarray, table: SunTable) -> np.ndarray:
+    """Fill `APSH_DTYPE` from a (N, S) mask of sun positions reaching each window."""
+    result = np.zeros(len(received), dtype=APSH_DTYPE)
+    total = table.total_hours
+    if total > 0:
+        result['apsh'] = 100 * (received @ table.weights) / total
+        result['winter_apsh'] = 100 * (received @ (table.weights * table.winter)) / total
+    result['passes'] = ((result['apsh'] >= BRE_APSH_TARGET)
+                        & (result['winter_apsh'] >= BRE_WINTER_APSH_TARGET))
+    return result
+
+
+def compute_apsh(
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    table: SunTable | None = None,
+    origin_offset: float = ORIGIN_OFFSET,
+) -> np.ndarray:
+    """
+    Trace every sun position in front of every window.
+
+    Args:
+        points: Window centre points, shape (N, 3)
+        normals: Window normals, shape (N, 3); normalised internally
+        scene: Obstruction scene, or None for an unobstructed sky
+        table: Sun positions (default: `sun_table()`)
+        origin_offset: Distance to lift ray origins off the surface
+
+    Returns:
+        Structured array of shape (N,) with `APSH_DTYPE`
+    """
+    table = table if table is not None else sun_table()
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = _normalize(normals)
+    received = normals @ table.directions.T > 0
+
+    if scene is not None and scene.triangle_count:
+        point_idx, sun_idx = np.nonzero(received)
+        origins = points[point_idx] + origin_offset * normals[point_idx]
+        blocked = trace_occlusion(scene.bvh, origins, table.directions[sun_idx])
+        received[point_idx[blocked], sun_idx[blocked]] = False
+    return _apsh_from_received(received, table)
+
+
+def lattice_cells(directions: np.ndarray,
+                  horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+                  vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION) -> np.ndarray:
+    """
+    Index of the `hemisphere_directions` sample nearest to each direction.
+
+    Returns:
+        Flat sample indices (azimuth * vertical_resolution + elevation), shape (S,)
+    """
+    delta_theta = (np.pi / 2) / vertical_resolution
+    delta_alpha = (2 * np.pi) / horizontal_resolution
+    theta = np.arcsin(np.clip(directions[:, 2], -1.0, 1.0))
+    alpha = np.arctan2(directions[:, 1], directions[:, 0]) % (2 * np.pi)
+    azimuth = np.rint(alpha / delta_alpha).astype(np.int64) % horizontal_resolution
+    elevation = np.clip(np.floor(theta / delta_theta).astype(np.int64), 0, vertical_resolution - 1)
+    return azimuth * vertical_resolution + elevation
+
+
+def compute_vsc_and_apsh(
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    table: SunTable | None = None,
+    horizontal_resolution: int = HORIZONTAL_ANGLE_RESOLUTION,
+    vertical_resolution: int = VERTICAL_ANGLE_RESOLUTION,
+    sky_multiplier: float = CIE_SKY_MULTIPLIER,
+    origin_offset: float = ORIGIN_OFFSET,
+    snap_to_lattice: bool = False,
+) -> np.ndarray:
+    """
+    VSC and APSH for the same windows in one structured array.
+
+    The sun directions in front of each window are traced alongside the VSC
+    lattice in one `compute_visibility` call, but no lattice ray stands in
+    for a sun ray: the cost is that of `compute_vsc_batch` and
+    `compute_apsh` together, and the APSH equals `compute_apsh` exactly.
+
+    With `snap_to_lattice`, each sun position instead takes the visibility
+    of the lattice sample it is nearest to (at most half a cell, about 1.4°
+    at 180×45, away). Sun cells just behind a window's lattice front are
+    traced too, so no sun position in front of the window is lost. This
+    costs no rays beyond the VSC, but a window whose view of the sun path
+    is cut by an obstruction edge can be off by more than one APSH point,
+    too much to judge it against the BRE targets.
+
+    Args:
+        points: Window centre points, shape (N, 3)
+        normals: Window normals, shape (N, 3); normalised internally
+        scene: Obstruction scene, or None for an unobstructed sky
+        table: Sun positions (default: `sun_table()`)
+        horizontal_resolution: Number of azimuth samples
+        vertical_resolution: Number of elevation samples
+        sky_multiplier: k in the luminance model L ∝ 1 + k·sin(θ)
+        origin_offset: Distance to lift ray origins off the surface
+        snap_to_lattice: Estimate the APSH from the lattice rays only
+
+    Returns:
+        Structured array of shape (N,) with a 'vsc' field followed by the
+        `APSH_DTYPE` fields; without 'passes' when `snap_to_lattice` is set
+    """
+    table = table if table is not None else sun_table()
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = _normalize(normals)
+    directions, solid_angles = hemisphere_directions(horizontal_resolution, vertical_resolution)
+    weights = sky_weights(normals, directions, solid_angles, sky_multiplier)
+
+    in_front = normals @ table.directions.T > 0
+
+    if snap_to_lattice:
+        cells = lattice_cells(table.directions, horizontal_resolution, vertical_resolution)
+        needed = weights > 0
+        point_idx, sun_idx = np.nonzero(in_front)
+        needed[point_idx, cells[sun_idx]] = True
+        visible = compute_visibility(scene, points, normals, directions,
+                                     active=needed, origin_offset=origin_offset)
+        received = in_front & visible[:, cells]
+        names = [name for name in APSH_DTYPE.names if name != 'passes']
+    else:
+        # Sun rays go after the lattice rays; none of them is shared
+        visible = compute_visibility(scene, points, normals,
+                                     np.concatenate([directions, table.directions]),
+                                     active=np.hstack([weights > 0, in_front]),
+                                     origin_offset=origin_offset)
+        visible, received = visible[:, :len(directions)], visible[:, len(directions):]
+        names = list(APSH_DTYPE.names)
+    apsh = _apsh_from_received(received, table)
+
+    result = np.zeros(len(points), dtype=[('vsc', np.float64)]
+                      + [(name, APSH_DTYPE[name]) for name in names])
+    result['vsc'] = np.sum(weights * visible, axis=1)
+    for name in names:
+        result[name] = apsh[name]
+    return result
@@ -0,0 +1,53 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from cache import ResultCache, compute_vsc_cached
+from jobs import VSCJobRunner
+
+RESOLUTION = {'horizontal_resolution': 36, 'vertical_resolution': 9}
+
+
+@pytest.fixture
+def points_with_zero_normal():
+    points = np.zeros((3, 3))
+    normals = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+    return points, normals
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_cached_zero_normal_is_computed_but_not_stored(tmp_path, points_with_zero_normal):
+    cache = ResultCache(tmp_path / 'results.sqlite')
+    points, normals = points_with_zero_normal
+
+    values = compute_vsc_cached(cache, points, normals, **RESOLUTION)
+    assert np.isnan(values[1]) and np.isfinite(values[[0, 2]]).all()
+    assert len(cache) == 2
+    np.testing.assert_array_equal(compute_vsc_cached(cache, points, normals, **RESOLUTION), values)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_job_with_zero_normal_completes(tmp_path, points_with_zero_normal):
+    points, normals = points_with_zero_normal
+
+    async def run():
+        with ThreadPoolExecutor(2) as executor:
+            async with VSCJobRunner(executor, cache=ResultCache(tmp_path / 'results.sqlite')) as runner:
+                return await runner.submit(points, normals, **RESOLUTION).result(), len(runner.cache)
+
+    values, stored = asyncio.run(run())
+    assert np.isnan(values[1]) and np.isfinite(values[[0, 2]]).all()
+    assert stored == 2
+
+
+def test_cache_path_expands_home(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    cache = ResultCache('~/.cache/vsc/results.sqlite')
+    cache.put_many([b'key'], np.array([12.5]))
+
+    assert cache.path == str(tmp_path / '.cache' / 'vsc' / 'results.sqlite')
+    assert (tmp_path / '.cache' / 'vsc' / 'results.sqlite').exists()
+    assert not (tmp_path / '~').exists()
@@ -0,0 +1,29 @@
+import asyncio
+from concurrent.futures import Executor, Future
+
+import numpy as np
+
+from batch import compute_vsc_batch
+from jobs import VSCJobRunner
+
+RESOLUTION = {'horizontal_resolution': 36, 'vertical_resolution': 9}
+
+
+class InlineExecutor(Executor):
+    """Runs each call immediately; has none of the stdlib pools' private attributes."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def test_runner_accepts_executor_without_worker_count():
+    points = np.zeros((5, 3))
+    normals = np.tile([0.0, 1.0, 0.0], (5, 1))
+
+    async def run():
+        async with VSCJobRunner(InlineExecutor()) as runner:
+            return await runner.submit(points, normals, chunk_size=2, **RESOLUTION).result()
+
+    np.testing.assert_allclose(asyncio.run(run()), compute_vsc_batch(points, normals, **RESOLUTION))
@@ -0,0 +1,36 @@
+import numpy as np
+
+from progressive import ProgressiveVSC
+
+LEVELS = ((36, 9), (72, 18), (144, 36))
+
+
+def _windows():
+    return np.zeros((4, 3)), np.tile([1.0, 0.0, 0.0], (4, 1))
+
+
+def test_cancel_from_first_update():
+    updates = []
+
+    def on_update(estimate):
+        updates.append(estimate)
+        progressive.cancel()
+
+    # The first update arrives inside __init__, so the callback needs the
+    # instance before the constructor returns
+    progressive = ProgressiveVSC.__new__(ProgressiveVSC)
+    progressive.__init__(*_windows(), levels=LEVELS, on_update=on_update)
+
+    assert len(updates) == 1
+    assert progressive.done()
+    assert progressive.result(timeout=5) is updates[0]
+
+
+def test_refines_to_final_level():
+    updates = []
+    points, normals = _windows()
+    progressive = ProgressiveVSC(points, normals, levels=LEVELS, on_update=updates.append)
+
+    final = progressive.result(timeout=30)
+    assert final.final and updates[-1] is final
+    assert [estimate.final for estimate in updates] == [False] * (len(LEVELS) - 1) + [True]
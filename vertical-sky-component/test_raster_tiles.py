@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from raster_tiles import TilePyramid, grid_spacing
+
+
+def _grid(columns: int, rows: int, spacing: float, origin=(3.0, -2.0)) -> np.ndarray:
+    u, v = np.meshgrid(np.arange(columns) * spacing, np.arange(rows) * spacing)
+    return np.stack([u.ravel() + origin[0], v.ravel() + origin[1]], axis=1)
+
+
+@pytest.mark.parametrize('columns, rows, spacing', [(3, 3, 1.0), (5, 5, 1.0), (10, 10, 1.0),
+                                                    (12, 4, 0.5), (2, 7, 2.5)])
+def test_grid_spacing_recovers_regular_grid(columns, rows, spacing):
+    assert grid_spacing(_grid(columns, rows, spacing)) == pytest.approx(spacing)
+
+
+def test_grid_spacing_of_line_and_single_point():
+    assert grid_spacing(_grid(6, 1, 0.5)) == pytest.approx(0.5)
+    assert grid_spacing(_grid(1, 1, 1.0)) is None
+
+
+@pytest.mark.parametrize('columns, rows', [(3, 3), (5, 5), (10, 10), (12, 4)])
+def test_estimated_spacing_render_has_no_gaps(columns, rows):
+    coordinates = _grid(columns, rows, 1.0)
+    values = np.linspace(0, 40, len(coordinates))
+    pyramid = TilePyramid(coordinates, values, max_zoom=6)
+
+    mean = pyramid.mean(pyramid.max_zoom)
+    covered = ~np.isnan(mean)
+    rows_used = np.flatnonzero(covered.any(axis=1))
+    cols_used = np.flatnonzero(covered.any(axis=0))
+    footprint = covered[rows_used[0]:rows_used[-1] + 1, cols_used[0]:cols_used[-1] + 1]
+    assert footprint.all()
+
+
+def test_all_nan_input_gives_transparent_tiles():
+    pyramid = TilePyramid(np.zeros((4, 2)), np.full(4, np.nan))
+    assert pyramid.tile(0, 0, 0)[..., 3].max() == 0
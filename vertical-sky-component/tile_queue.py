@@ -0,0 +1,517 @@
+"""
+File-System Tile Queue
+
+Distributes one large VSC job over any number of worker processes, on this
+machine or others, that share a directory. It is the local-disk stand-in for
+the external GPU worker queue described in `info-vsc.md`.
+
+Key concepts:
+- `prepare_queue` splits the observation points into spatial tiles (see
+  `culling.partition_tiles`) and writes one task per tile, together with a
+  binary scene file holding only the meshes that can be seen from that tile
+- Workers claim a task by hard-linking a complete lease file into place,
+  which fails if one exists; a lease carries a token and an expiry that the
+  worker keeps renewing while it computes, and stops renewing once the
+  lease has expired or carries another token
+- A lease that expired (crashed or stalled worker) is broken by the next
+  worker, which counts as a new attempt; after `max_attempts` the task is
+  marked failed instead of being retried forever. Breaking moves the file
+  aside and checks it is still the expired lease, putting it back if a
+  fresh claim was moved instead
+- Results are written to a temporary file and renamed into place, so a
+  result file is either complete or absent. Computing a task twice writes
+  the same values again, which makes duplicate work harmless
+- `merge_results` assembles the per-tile results into the final array
+
+Queue directory layout:
+    queue.json                 manifest: point count, options, task list
+    tasks/<task>.npz           point indices, points and normals of a task
+    scenes/<digest>.vscscene   obstruction subsets, named by their geometry hash
+    leases/<task>.lease        current claim (worker, expiry)
+    attempts/<task>.<n>        one marker per claim
+    errors/<task>.<n>.txt      traceback of a failed attempt
+    results/<task>.npy         VSC values for the task's points
+    failed/<task>.json         tasks that ran out of attempts
+
+Usage:
+    python tile_queue.py prepare points.npy normals.npy /shared/q --scene city.vscscene
+    python tile_queue.py work /shared/q          # on as many machines as you like
+    python tile_queue.py status /shared/q
+    python tile_queue.py merge /shared/q vsc.npy
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from collections.abc import Callable
+
+import numpy as np
+
+from batch import ORIGIN_OFFSET, _normalize, compute_vsc_batch
+from cache import scene_digest
+from culling import DEFAULT_TILE_SIZE, _mesh_boxes, classify_meshes, partition_tiles
+from main import VERTICAL_ANGLE_RESOLUTION
+from obstruction import Scene
+from scene_format import SCENE_SUFFIX, open_scene, save_scene
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Constants
+# ═══════════════════════════════════════════════════════════════════════════════
+
+QUEUE_VERSION = 1
+MANIFEST_NAME = 'queue.json'
+DEFAULT_TASK_POINTS = 4096     # Split tiles with more points into several tasks
+DEFAULT_LEASE_SECONDS = 300.0  # A worker silent for this long loses its task
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2.0            # Seconds between scans while others hold leases
+
+_SUBDIRS = ('tasks', 'scenes', 'leases', 'attempts', 'errors', 'results', 'failed')
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# File Helpers
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write via a unique temporary file and rename, so readers see all or nothing."""
+    tmp_path = f'{path}.tmp-{uuid.uuid4().hex}'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_manifest(queue_dir: str | os.PathLike) -> dict:
+    """Read a queue's manifest; raises FileNotFoundError if it is not prepared."""
+    manifest = _read_json(os.path.join(queue_dir, MANIFEST_NAME))
+    if manifest is None:
+        raise FileNotFoundError(f"{queue_dir} has no {MANIFEST_NAME}; run prepare first")
+    if manifest.get('version') != QUEUE_VERSION:
+        raise ValueError(f"{queue_dir}: unsupported queue version {manifest.get('version')}")
+    return manifest
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Preparing a Queue
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def prepare_queue(
+    queue_dir: str | os.PathLike,
+    points: np.ndarray,
+    normals: np.ndarray,
+    scene: Scene | None = None,
+    tile_size: float = DEFAULT_TILE_SIZE,
+    task_points: int = DEFAULT_TASK_POINTS,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    **options,
+) -> list[str]:
+    """
+    Split a VSC job into tile tasks in a shared directory.
+
+    Each tile's scene keeps every mesh that could block a sample ray from
+    the tile (culling only, no far-field approximation), so the merged
+    result equals `compute_vsc_batch` on the full scene.
+
+    Args:
+        queue_dir: Directory to create the queue in; must not hold a queue yet
+        points: Observation points, shape (N, 3)
+        normals: Surface normals, shape (N, 3)
+        scene: Obstruction scene, or None for an unobstructed sky
+        tile_size: Tile edge length in scene units
+        task_points: Maximum points per task
+        max_attempts: Claims per task before it is marked failed
+        lease_seconds: How long a claim lasts without renewal
+        **options: Forwarded to `compute_vsc_batch` by the workers
+
+    Returns:
+        Task identifiers
+    """
+    queue_dir = os.fspath(queue_dir)
+    if os.path.exists(os.path.join(queue_dir, MANIFEST_NAME)):
+        raise FileExistsError(f"{queue_dir} already holds a queue")
+    for name in _SUBDIRS:
+        os.makedirs(os.path.join(queue_dir, name), exist_ok=True)
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    normals = _normalize(normals)
+    scene = scene if scene is not None else Scene()
+    boxes = _mesh_boxes(scene)
+    origins = points + options.get('origin_offset', ORIGIN_OFFSET) * normals
+    lowest_elevation = (np.pi / 4) / options.get('vertical_resolution', VERTICAL_ANGLE_RESOLUTION)
+
+    tasks = []
+    for tile in partition_tiles(origins, tile_size):
+        near, far, _ = classify_meshes(tile, boxes, lowest_elevation, tolerance=0.0)
+        subset = Scene([scene.meshes[i] for i in np.flatnonzero(near | far)])
+        # Named by content, so a file left by an earlier run is only reused
+        # if it holds exactly this geometry (save_scene writes atomically)
+        scene_file = os.path.join('scenes', f'{scene_digest(subset).hex()[:32]}{SCENE_SUFFIX}')
+        if not os.path.exists(os.path.join(queue_dir, scene_file)):
+            save_scene(subset, os.path.join(queue_dir, scene_file))
+
+        for part, lo in enumerate(range(0, len(tile.indices), task_points)):
+            indices = tile.indices[lo:lo + task_points]
+            task_id = f'tile_{tile.key[0]}_{tile.key[1]}_{part}'
+            buffer = _npz_bytes(indices=indices, points=points[indices], normals=normals[indices])
+            _write_atomic(os.path.join(queue_dir, 'tasks', f'{task_id}.npz'), buffer)
+            tasks.append({'id': task_id, 'scene': scene_file, 'points': len(indices)})
+
+    # The manifest goes last: workers ignore a directory until it exists
+    manifest = {
+        'version': QUEUE_VERSION, 'point_count': len(points), 'options': options,
+        'max_attempts': max_attempts, 'lease_seconds': lease_seconds, 'tasks': tasks,
+    }
+    _write_atomic(os.path.join(queue_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode())
+    return [task['id'] for task in tasks]
+
+
+def _npz_bytes(**arrays) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Leases
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _take_if(path: str, accept: Callable[[dict | None], bool]) -> bool:
+    """
+    Remove `path` if `accept` approves the lease it holds when removed.
+
+    The file is first renamed to a unique name, so what `accept` sees is
+    exactly what gets removed. A lease that was replaced after the caller
+    last read it is linked back into place instead.
+
+    Returns:
+        True if the lease was removed
+    """
+    moved = f'{path}.taken-{uuid.uuid4().hex}'
+    try:
+        os.rename(path, moved)
+    except FileNotFoundError:
+        return False
+    try:
+        if accept(_read_json(moved)):
+            return True
+        try:
+            os.link(moved, path)
+        except FileExistsError:  # Claimed again while it was moved aside
+            pass
+        return False
+    finally:
+        os.remove(moved)
+
+
+class Lease:
+    """
+    Exclusive, expiring claim on one task.
+
+    Acquire with `Lease.acquire`; while held, a background thread renews the
+    expiry every third of the lease duration. Renewal stops for good once the
+    lease has expired or another worker's token replaced it; `lost` is then set.
+    """
+
+    def __init__(self, path: str, token: str, worker: str, duration: float):
+        self.path = path
+        self.token = token
+        self.worker = worker
+        self.duration = duration
+        self.expires = 0.0
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew_loop, daemon=True)
+
+    def _payload(self) -> bytes:
+        self.expires = time.time() + self.duration
+        return json.dumps({'token': self.token, 'worker': self.worker,
+                           'expires': self.expires}).encode()
+
+    @classmethod
+    def acquire(cls, path: str, worker: str, duration: float) -> 'Lease | None':
+        """
+        Try to claim `path`, breaking it first if its holder's lease expired.
+
+        Returns:
+            The held lease, or None if another worker holds it
+        """
+        lease = cls(path, uuid.uuid4().hex, worker, duration)
+        for _ in range(2):
+            # Linking a fully written file means readers never see a partial lease
+            tmp_path = f'{path}.tmp-{lease.token}'
+            with open(tmp_path, 'wb') as f:
+                f.write(lease._payload())
+            try:
+                os.link(tmp_path, path)
+            except FileExistsError:
+                current = _read_json(path)
+                if current is not None and current.get('expires', 0) > time.time():
+                    return None
+                # Expired, or unreadable (left corrupt by a dead writer). Only
+                # break it if the file moved aside is still that same lease
+                token = (current or {}).get('token')
+
+                def still_expired(found: dict | None) -> bool:
+                    found = found or {}
+                    return found.get('token') == token and found.get('expires', 0) <= time.time()
+
+                if not _take_if(path, still_expired):
+                    return None
+                continue
+            finally:
+                os.remove(tmp_path)
+            lease._thread.start()
+            return lease
+        return None
+
+    def held(self) -> bool:
+        """True if the lease file still carries this lease's token and it has not expired."""
+        if time.time() >= self.expires:
+            return False
+        current = _read_json(self.path)
+        return current is not None and current.get('token') == self.token
+
+    def _renew_loop(self) -> None:
+        while not self._stop.wait(self.duration / 3):
+            # Past its expiry another worker may break the lease at any moment,
+            # so an overdue renewal would overwrite their claim
+            if not self.held():
+                self.lost.set()
+                return
+            _write_atomic(self.path, self._payload())
+
+    def release(self) -> None:
+        """Stop renewing and remove the lease if it is still ours."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        if not self.lost.is_set():
+            _take_if(self.path, lambda found: (found or {}).get('token') == self.token)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Workers
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _task_state(queue_dir: str, task_id: str) -> str:
+    if os.path.exists(os.path.join(queue_dir, 'results', f'{task_id}.npy')):
+        return 'done'
+    if os.path.exists(os.path.join(queue_dir, 'failed', f'{task_id}.json')):
+        return 'failed'
+    lease = _read_json(os.path.join(queue_dir, 'leases', f'{task_id}.lease'))
+    if lease is not None and lease.get('expires', 0) > time.time():
+        return 'leased'
+    return 'pending'
+
+
+def _attempt_count(queue_dir: str, task_id: str) -> int:
+    prefix = f'{task_id}.'
+    return sum(name.startswith(prefix) for name in os.listdir(os.path.join(queue_dir, 'attempts')))
+
+
+def run_task(queue_dir: str | os.PathLike, task: dict, options: dict) -> np.ndarray:
+    """
+    Compute one task and write its result file.
+
+    Safe to call more than once for the same task: the result is replaced
+    atomically with identical values.
+
+    Returns:
+        VSC values for the task's points
+    """
+    queue_dir = os.fspath(queue_dir)
+    with np.load(os.path.join(queue_dir, 'tasks', f"{task['id']}.npz")) as data:
+        points, normals = data['points'], data['normals']
+    scene = open_scene(os.path.join(queue_dir, task['scene']))
+    values = compute_vsc_batch(points, normals, scene, **options)
+
+    buffer = io.BytesIO()
+    np.save(buffer, values)
+    _write_atomic(os.path.join(queue_dir, 'results', f"{task['id']}.npy"), buffer.getvalue())
+    return values
+
+
+def run_worker(
+    queue_dir: str | os.PathLike,
+    worker_id: str | None = None,
+    max_tasks: int | None = None,
+    poll_interval: float = POLL_INTERVAL,
+) -> int:
+    """
+    Claim and compute tasks until the queue is finished.
+
+    Workers may be started and killed at any time; a killed worker's task
+    becomes available again once its lease expires.
+
+    Args:
+        queue_dir: Prepared queue directory
+        worker_id: Label recorded in leases (default: host and process id)
+        max_tasks: Stop after this many tasks
+        poll_interval: Seconds to wait when all open tasks are leased
+
+    Returns:
+        Number of tasks this worker completed
+    """
+    queue_dir = os.fspath(queue_dir)
+    manifest = load_manifest(queue_dir)
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    tasks = list(manifest['tasks'])
+    random.Random(worker_id).shuffle(tasks)  # Spread workers over the queue
+    completed = 0
+
+    while max_tasks is None or completed < max_tasks:
+        states = {task['id']: _task_state(queue_dir, task['id']) for task in tasks}
+        open_tasks = [task for task in tasks if states[task['id']] == 'pending']
+        if not open_tasks:
+            if all(state in ('done', 'failed') for state in states.values()):
+                return completed
+            time.sleep(poll_interval)
+            continue
+
+        for task in open_tasks:
+            if max_tasks is not None and completed >= max_tasks:
+                break
+            if _process(queue_dir, task, manifest, worker_id):
+                completed += 1
+    return completed
+
+
+def _process(queue_dir: str, task: dict, manifest: dict, worker_id: str) -> bool:
+    """Claim, run and release one task; returns True if this worker finished it."""
+    task_id = task['id']
+    lease = Lease.acquire(os.path.join(queue_dir, 'leases', f'{task_id}.lease'),
+                          worker_id, manifest['lease_seconds'])
+    if lease is None:
+        return False
+    try:
+        if _task_state(queue_dir, task_id) in ('done', 'failed'):  # Finished meanwhile
+            return False
+        attempt = _attempt_count(queue_dir, task_id)
+        if attempt >= manifest['max_attempts']:
+            record = {'task': task_id, 'attempts': attempt, 'worker': worker_id}
+            _write_atomic(os.path.join(queue_dir, 'failed', f'{task_id}.json'),
+                          json.dumps(record).encode())
+            return False
+        _write_atomic(os.path.join(queue_dir, 'attempts', f'{task_id}.{attempt}'), worker_id.encode())
+        try:
+            run_task(queue_dir, task, manifest['options'])
+        except Exception:
+            _write_atomic(os.path.join(queue_dir, 'errors', f'{task_id}.{attempt}.txt'),
+                          traceback.format_exc().encode())
+            return False
+        return True
+    finally:
+        lease.release()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Status and Merge
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def queue_status(queue_dir: str | os.PathLike) -> dict[str, int]:
+    """
+    Count tasks per state.
+
+    Returns:
+        Mapping with keys 'pending', 'leased', 'done', 'failed'
+    """
+    queue_dir = os.fspath(queue_dir)
+    counts = dict.fromkeys(('pending', 'leased', 'done', 'failed'), 0)
+    for task in load_manifest(queue_dir)['tasks']:
+        counts[_task_state(queue_dir, task['id'])] += 1
+    return counts
+
+
+def merge_results(queue_dir: str | os.PathLike, allow_partial: bool = False) -> np.ndarray:
+    """
+    Assemble the per-task results into one array in the original point order.
+
+    Args:
+        queue_dir: Queue directory
+        allow_partial: Leave unfinished points as NaN instead of raising
+
+    Returns:
+        VSC values (percentage), shape (N,)
+    """
+    queue_dir = os.fspath(queue_dir)
+    manifest = load_manifest(queue_dir)
+    values = np.full(manifest['point_count'], np.nan)
+    missing = []
+    for task in manifest['tasks']:
+        result_path = os.path.join(queue_dir, 'results', f"{task['id']}.npy")
+        if not os.path.exists(result_path):
+            missing.append(task['id'])
+            continue
+        with np.load(os.path.join(queue_dir, 'tasks', f"{task['id']}.npz")) as data:
+            values[data['indices']] = np.load(result_path)
+    if missing and not allow_partial:
+        raise RuntimeError(f"{len(missing)} of {len(manifest['tasks'])} tasks unfinished: "
+                           f"{', '.join(missing[:5])}{', ...' if len(missing) > 5 else ''}")
+    return values
+
+
+def main():
+    """Command line entry point for preparing, working on and merging queues."""
+    parser = argparse.ArgumentParser(description="Distribute a VSC job over a shared directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    prepare = commands.add_parser('prepare', help="split points into tile tasks")
+    prepare.add_argument('points', help="observation points, .npy with shape (N, 3)")
+    prepare.add_argument('normals', help="surface normals, .npy with shape (N, 3)")
+    prepare.add_argument('queue_dir')
+    prepare.add_argument('--scene', help=f"obstruction scene ({SCENE_SUFFIX})")
+    prepare.add_argument('--tile-size', type=float, default=DEFAULT_TILE_SIZE)
+    prepare.add_argument('--task-points', type=int, default=DEFAULT_TASK_POINTS)
+    prepare.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    prepare.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS)
+
+    work = commands.add_parser('work', help="claim and compute tasks until none are left")
+    work.add_argument('queue_dir')
+    work.add_argument('--worker-id')
+    work.add_argument('--max-tasks', type=int)
+
+    status = commands.add_parser('status', help="count tasks per state")
+    status.add_argument('queue_dir')
+
+    merge = commands.add_parser('merge', help="assemble results into one .npy file")
+    merge.add_argument('queue_dir')
+    merge.add_argument('output')
+    merge.add_argument('--partial', action='store_true', help="write NaN for unfinished points")
+    args = parser.parse_args()
+
+    if args.command == 'prepare':
+        scene = open_scene(args.scene) if args.scene else None
+        tasks = prepare_queue(args.queue_dir, np.load(args.points), np.load(args.normals), scene,
+                              args.tile_size, args.task_points, args.max_attempts,
+                              args.lease_seconds)
+        print(f"✓ Prepared {len(tasks)} tasks in {args.queue_dir}")
+    elif args.command == 'work':
+        done = run_worker(args.queue_dir, args.worker_id, args.max_tasks)
+        print(f"✓ Completed {done} tasks")
+    elif args.command == 'status':
+        print(', '.join(f'{state}: {count}' for state, count in queue_status(args.queue_dir).items()))
+    else:
+        np.save(args.output, merge_results(args.queue_dir, args.partial))
+        print(f"✓ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()